@@ -7,20 +7,80 @@ import asyncio
 import aiohttp
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from collections import Counter
+from functools import lru_cache
 import json
+import orjson
+import hashlib
+import time
 import smtplib
 from email.mime.text import MimeText
 from email.mime.multipart import MimeMultipart
+import os
 import re
-from textblob import TextBlob
+import zlib
 
 from main import IBKRPortfolioManager
+from jit import njit, prange, NUMBA_AVAILABLE
+from sentiment_lexicon import lexicon_polarity, lexicon_polarities
 
-@dataclass
+# Portfolios larger than this scan positions with the parallel kernel
+_PARALLEL_SCAN_MIN_POSITIONS = 512
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _scan_positions(pnl: np.ndarray, mv: np.ndarray, thr: float) -> np.ndarray:
+    """Mask of losing positions whose loss ratio is at or below thr"""
+    n = pnl.shape[0]
+    out = np.empty(n, dtype=np.bool_)
+    for i in prange(n):
+        out[i] = pnl[i] < 0 and mv[i] != 0 and pnl[i] / abs(mv[i]) <= thr
+    return out
+
+if NUMBA_AVAILABLE:
+    _scan_positions(np.zeros(1), np.ones(1), -0.1)
+
+# Headline deduplication: exact match on normalized tokens, plus MinHash
+# over character 3-gram shingles to collapse near-duplicate headlines
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_MINHASH_PERMUTATIONS = 64
+_MINHASH_BANDS = 8  # 8 bands of 8 rows each
+_NEAR_DUPLICATE_THRESHOLD = 0.85
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_minhash_rng = np.random.default_rng(1)
+_MINHASH_A = _minhash_rng.integers(1, 1 << 32, _MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _minhash_rng.integers(0, 1 << 32, _MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+def _minhash_signature(text: str) -> np.ndarray:
+    """MinHash signature of a normalized title's character 3-grams"""
+    shingles = {text[i:i + 3] for i in range(max(1, len(text) - 2))}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    return ((np.outer(_MINHASH_A, hashes) + _MINHASH_B[:, None]) % _MERSENNE_PRIME).min(axis=1)
+
+def _compile_keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """Compile keywords into one case-insensitive alternation (longest first)"""
+    ordered = sorted(keywords, key=len, reverse=True)
+    return re.compile(r'\b(' + '|'.join(map(re.escape, ordered)) + r')\b', re.IGNORECASE)
+
+# Financial keywords used for relevance scoring
+RELEVANCE_KEYWORDS = (
+    'earnings', 'revenue', 'profit', 'loss', 'guidance', 'forecast',
+    'merger', 'acquisition', 'ipo', 'dividend', 'split', 'buyback'
+)
+
+# Entries kept by the per-text sentiment and relevance score caches
+SCORE_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=64)
+def _mention_scanner(symbols: frozenset) -> re.Pattern:
+    """One pattern matching every tracked symbol and relevance keyword"""
+    return _compile_keyword_pattern(list(symbols) + list(RELEVANCE_KEYWORDS))
+
+@dataclass(slots=True, frozen=True)
 class MarketNews:
     title: str
     summary: str
@@ -31,7 +91,7 @@ class MarketNews:
     sentiment_score: float  # -1 (negative) to 1 (positive)
     relevance_score: float  # 0 to 1
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class MarketAlert:
     alert_type: str
     symbol: str
@@ -41,6 +101,25 @@ class MarketAlert:
     data: Dict
     action_suggested: Optional[str] = None
 
+def _make_financial_scorer(bull_re: re.Pattern, bear_re: re.Pattern) -> Callable[[str], float]:
+    """
+    Build the financial keyword scorer with the scanners' findall methods bound
+    as defaults, so each call reads locals instead of instance attributes
+    """
+    def _calculate_financial_sentiment(text: str, _bull=bull_re.findall,
+                                       _bear=bear_re.findall, _len=len) -> float:
+        """Calculate sentiment based on financial keywords"""
+        bullish_count = _len(_bull(text))
+        bearish_count = _len(_bear(text))
+        
+        total_keywords = bullish_count + bearish_count
+        if total_keywords == 0:
+            return 0.0
+        
+        return (bullish_count - bearish_count) / total_keywords
+    
+    return _calculate_financial_sentiment
+
 class SentimentAnalyzer:
     """Analyze sentiment from text using multiple approaches"""
     
@@ -59,42 +138,79 @@ class SentimentAnalyzer:
             'breakdown', 'decline', 'loss', 'earnings miss', 'revenue decline',
             'contraction', 'bankruptcy', 'lawsuit', 'investigation', 'scandal'
         ]
+        
+        # Single-pass scanners over the keyword lists
+        self._bull_re = _compile_keyword_pattern(self.bullish_keywords)
+        self._bear_re = _compile_keyword_pattern(self.bearish_keywords)
+        
+        # Keyword scorer specialized to this instance's scanners
+        self._calculate_financial_sentiment = _make_financial_scorer(self._bull_re, self._bear_re)
+        
+        # Scores for recently seen texts (polling returns the same headlines)
+        self._sentiment_cache: Dict[str, float] = {}
+    
+    def clear_cache(self):
+        """Forget cached sentiment scores"""
+        self._sentiment_cache.clear()
     
     def analyze_text_sentiment(self, text: str) -> float:
         """Analyze sentiment of text (-1 to 1)"""
+        cached = self._sentiment_cache.get(text)
+        if cached is not None:
+            return cached
+        
         try:
-            # Use TextBlob for basic sentiment
-            blob = TextBlob(text.lower())
-            base_sentiment = blob.sentiment.polarity
-            
-            # Apply financial keyword weighting
-            financial_sentiment = self._calculate_financial_sentiment(text.lower())
-            
-            # Weighted combination
-            combined_sentiment = (base_sentiment * 0.6) + (financial_sentiment * 0.4)
-            
-            return max(-1.0, min(1.0, combined_sentiment))
-            
+            # Lexicon polarity from TextBlob's pattern analyzer
+            return self._combine_sentiment(text, lexicon_polarity(text))
         except Exception as e:
-            self.logger.error(f"Error analyzing sentiment: {e}")
+            self.logger.error("Error analyzing sentiment: %s", e)
             return 0.0
     
-    def _calculate_financial_sentiment(self, text: str) -> float:
-        """Calculate sentiment based on financial keywords"""
-        bullish_count = sum(1 for keyword in self.bullish_keywords if keyword in text)
-        bearish_count = sum(1 for keyword in self.bearish_keywords if keyword in text)
+    def score_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Analyze sentiment of many texts at once (-1 to 1 each)
         
-        total_keywords = bullish_count + bearish_count
-        if total_keywords == 0:
-            return 0.0
+        Cached texts are not rescored, and a text repeated in the batch is
+        scored once; each remaining text still goes through the analyzer
+        """
+        scores = np.zeros(len(texts))
+        missing: Dict[str, List[int]] = {}
+        for k, text in enumerate(texts):
+            cached = self._sentiment_cache.get(text)
+            if cached is None:
+                missing.setdefault(text, []).append(k)
+            else:
+                scores[k] = cached
+        if not missing:
+            return scores
         
-        sentiment = (bullish_count - bearish_count) / total_keywords
+        try:
+            polarities = lexicon_polarities(list(missing))
+            for (text, positions), base_sentiment in zip(missing.items(), polarities):
+                scores[positions] = self._combine_sentiment(text, float(base_sentiment))
+        except Exception as e:
+            self.logger.error("Error analyzing sentiment: %s", e)
+        return scores
+    
+    def _combine_sentiment(self, text: str, base_sentiment: float) -> float:
+        """Weight lexicon polarity with financial keywords and cache the result"""
+        financial_sentiment = self._calculate_financial_sentiment(text)
+        
+        # Weighted combination
+        combined_sentiment = (base_sentiment * 0.6) + (financial_sentiment * 0.4)
+        
+        sentiment = max(-1.0, min(1.0, combined_sentiment))
+        
+        self._sentiment_cache[text] = sentiment
+        if len(self._sentiment_cache) > SCORE_CACHE_SIZE:
+            del self._sentiment_cache[next(iter(self._sentiment_cache))]
         return sentiment
 
 class NewsMonitor:
     """Monitor financial news and extract relevant information"""
     
-    def __init__(self, api_keys: Dict[str, str]):
+    def __init__(self, api_keys: Dict[str, str], cache_dir: str = '.news_cache',
+                 cache_ttl: int = 300):
         self.api_keys = api_keys
         self.sentiment_analyzer = SentimentAnalyzer()
         self.logger = logging.getLogger(__name__ + ".NewsMonitor")
@@ -105,6 +221,98 @@ class NewsMonitor:
             'finnhub': 'https://finnhub.io/api/v1',
             'newsapi': 'https://newsapi.org/v2/everything'
         }
+        
+        # Shared HTTP session (created lazily) and per-source concurrency limit
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._request_limit = asyncio.Semaphore(5)
+        
+        # On-disk response cache (seconds before revalidating with the server)
+        self.cache_dir = cache_dir
+        self.cache_ttl = cache_ttl
+        self._parsed_news: Dict[str, List[MarketNews]] = {}  # Parsed items per response version
+        self._relevance_cache: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _fetch_json(self, url: str, params: Dict) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        GET a JSON payload through the on-disk cache
+        
+        Fresh entries are served without a request; stale ones are revalidated
+        with ETag/Last-Modified so an unchanged payload is not downloaded again.
+        
+        Returns:
+            (version, data) where version changes whenever the payload does,
+            or (None, None) if the request failed
+        """
+        key = hashlib.sha256(json.dumps([url, params], sort_keys=True, default=str).encode()).hexdigest()
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        
+        cached = None
+        try:
+            with open(path, 'rb') as f:
+                cached = orjson.loads(f.read())
+        except (OSError, ValueError):
+            pass
+        
+        now = time.time()
+        if cached and now - cached['checked_at'] < self.cache_ttl:
+            return f"{key}:{cached['received_at']}", cached['data']
+        
+        headers = {}
+        if cached and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        
+        session = await self._get_session()
+        async with self._request_limit:
+            async with session.get(url, params=params, headers=headers) as response:
+                if response.status == 304 and cached:
+                    cached['checked_at'] = now
+                elif response.status == 200:
+                    cached = {
+                        'data': orjson.loads(await response.read()),
+                        'etag': response.headers.get('ETag'),
+                        'last_modified': response.headers.get('Last-Modified'),
+                        'received_at': now,
+                        'checked_at': now
+                    }
+                else:
+                    return None, None
+        
+        try:
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(cached))
+        except OSError as e:
+            self.logger.warning("Could not write news cache: %s", e)
+        
+        return f"{key}:{cached['received_at']}", cached['data']
+    
+    def clear_cache(self):
+        """Forget parsed news and cached scores (the on-disk response cache is kept)"""
+        self._parsed_news.clear()
+        self._relevance_cache.clear()
+        self.sentiment_analyzer.clear_cache()
+    
+    def _remember_parsed(self, version: str, news_items: List[MarketNews]):
+        """Keep parsed news for a response version so cache hits skip parsing"""
+        self._parsed_news[version] = news_items
+        if len(self._parsed_news) > 64:
+            del self._parsed_news[next(iter(self._parsed_news))]
     
     async def get_market_news(self, symbols: List[str], hours_back: int = 24) -> List[MarketNews]:
         """Get relevant market news for specified symbols"""
@@ -128,16 +336,21 @@ class NewsMonitor:
                 if isinstance(result, list):
                     all_news.extend(result)
                 elif isinstance(result, Exception):
-                    self.logger.error(f"News source error: {result}")
+                    self.logger.error("News source error: %s", result)
             
             # Remove duplicates and sort by relevance
             unique_news = self._deduplicate_news(all_news)
             unique_news.sort(key=lambda x: x.relevance_score, reverse=True)
+            top_news = unique_news[:50]  # Limit to top 50 articles
             
-            return unique_news[:50]  # Limit to top 50 articles
+            # Score sentiment for the whole feed in one batch
+            scores = self.sentiment_analyzer.score_batch(
+                [f"{item.title} {item.summary}" for item in top_news]
+            )
+            return [replace(item, sentiment_score=float(score)) for item, score in zip(top_news, scores)]
             
         except Exception as e:
-            self.logger.error(f"Error getting market news: {e}")
+            self.logger.error("Error getting market news: %s", e)
             return []
     
     async def _get_newsapi_news(self, symbols: List[str], hours_back: int) -> List[MarketNews]:
@@ -147,41 +360,59 @@ class NewsMonitor:
         
         news_items = []
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                for symbol in symbols[:5]:  # Limit API calls
-                    params = {
-                        'q': f'"{symbol}" OR "{symbol} stock"',
-                        'apiKey': self.api_keys['newsapi'],
-                        'sortBy': 'publishedAt',
-                        'language': 'en',
-                        'from': (datetime.now() - timedelta(hours=hours_back)).isoformat()
-                    }
-                    
-                    async with session.get(self.news_sources['newsapi'], params=params) as response:
-                        if response.status == 200:
-                            data = await response.json()
-                            
-                            for article in data.get('articles', [])[:10]:  # Top 10 per symbol
-                                if article['title'] and article['description']:
-                                    news_item = self._create_news_item(
-                                        article['title'],
-                                        article['description'],
-                                        article['url'],
-                                        article['source']['name'],
-                                        article['publishedAt'],
-                                        [symbol]
-                                    )
-                                    news_items.append(news_item)
-                        
-                        # Rate limiting
-                        await asyncio.sleep(0.1)
-                        
-        except Exception as e:
-            self.logger.error(f"NewsAPI error: {e}")
+        # Round the window start to the cache TTL so repeated polls share a cache entry
+        # (cache_ttl=0 turns caching off, so there is nothing to round to)
+        start = time.time() - hours_back * 3600
+        if self.cache_ttl:
+            start -= start % self.cache_ttl
+        from_time = datetime.fromtimestamp(start).isoformat()
+        
+        # Fetch symbols concurrently
+        results = await asyncio.gather(
+            *(self._get_newsapi_symbol_news(symbol, from_time) for symbol in symbols[:5]),  # Limit API calls
+            return_exceptions=True
+        )
+        
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error("NewsAPI error: %s", result)
+            else:
+                news_items.extend(result)
         
         return news_items
     
+    async def _get_newsapi_symbol_news(self, symbol: str, from_time: str) -> List[MarketNews]:
+        """Get NewsAPI articles for a single symbol"""
+        news_items = []
+        params = {
+            'q': f'"{symbol}" OR "{symbol} stock"',
+            'apiKey': self.api_keys['newsapi'],
+            'sortBy': 'publishedAt',
+            'language': 'en',
+            'from': from_time
+        }
+        
+        version, data = await self._fetch_json(self.news_sources['newsapi'], params)
+        if data is None:
+            return news_items
+        if version in self._parsed_news:
+            return list(self._parsed_news[version])
+        
+        for article in data.get('articles', [])[:10]:  # Top 10 per symbol
+            if article['title'] and article['description']:
+                news_item = self._create_news_item(
+                    article['title'],
+                    article['description'],
+                    article['url'],
+                    article['source']['name'],
+                    article['publishedAt'],
+                    [symbol]
+                )
+                news_items.append(news_item)
+        
+        self._remember_parsed(version, news_items)
+        return list(news_items)
+    
     async def _get_alpha_vantage_news(self, symbols: List[str], hours_back: int) -> List[MarketNews]:
         """Get news from Alpha Vantage"""
         if 'alpha_vantage' not in self.api_keys:
@@ -190,59 +421,73 @@ class NewsMonitor:
         news_items = []
         
         try:
-            async with aiohttp.ClientSession() as session:
-                params = {
-                    'function': 'NEWS_SENTIMENT',
-                    'apikey': self.api_keys['alpha_vantage'],
-                    'limit': 200
-                }
+            params = {
+                'function': 'NEWS_SENTIMENT',
+                'apikey': self.api_keys['alpha_vantage'],
+                'limit': 200
+            }
+            
+            version, data = await self._fetch_json(self.news_sources['alpha_vantage'], params)
+            if data is None:
+                return news_items
+            
+            # Parsed items depend on which symbols we track
+            version = f"{version}:{','.join(sorted(symbols))}"
+            if version in self._parsed_news:
+                return list(self._parsed_news[version])
+            
+            # Lowercase the symbols and build the scanner once, not once per article
+            symbols_l = [(symbol, symbol.lower()) for symbol in symbols]
+            scanner = _mention_scanner(frozenset(symbols))
+            
+            for article in data.get('feed', []):
+                # Check if article mentions our symbols; the same counts feed relevance
+                mentions = self._count_mentions(f"{article['title']} {article['summary']}", scanner)
+                mentioned_symbols = [symbol for symbol, symbol_l in symbols_l if symbol_l in mentions]
                 
-                async with session.get(self.news_sources['alpha_vantage'], params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        for article in data.get('feed', []):
-                            # Check if article mentions our symbols
-                            mentioned_symbols = []
-                            for symbol in symbols:
-                                if symbol.lower() in article['title'].lower() or symbol.lower() in article['summary'].lower():
-                                    mentioned_symbols.append(symbol)
-                            
-                            if mentioned_symbols:
-                                news_item = self._create_news_item(
-                                    article['title'],
-                                    article['summary'],
-                                    article['url'],
-                                    article['source'],
-                                    article['time_published'],
-                                    mentioned_symbols
-                                )
-                                news_items.append(news_item)
-                        
+                if mentioned_symbols:
+                    news_item = self._create_news_item(
+                        article['title'],
+                        article['summary'],
+                        article['url'],
+                        article['source'],
+                        article['time_published'],
+                        mentioned_symbols,
+                        mentions
+                    )
+                    news_items.append(news_item)
+            
+            self._remember_parsed(version, list(news_items))
+            
         except Exception as e:
-            self.logger.error(f"Alpha Vantage error: {e}")
+            self.logger.error("Alpha Vantage error: %s", e)
         
         return news_items
     
     def _create_news_item(self, title: str, summary: str, url: str, source: str, 
-                         timestamp_str: str, symbols: List[str]) -> MarketNews:
-        """Create a MarketNews object"""
+                         timestamp_str: str, symbols: List[str],
+                         mentions: Optional[Counter] = None) -> MarketNews:
+        """Create a MarketNews object (mentions: symbol/keyword counts if already scanned)"""
         
         # Parse timestamp
         try:
-            if 'T' in timestamp_str:
-                timestamp = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+            s = timestamp_str
+            if len(s) == 15 and s[8] == 'T':
+                # Alpha Vantage compact format: YYYYMMDDTHHMMSS
+                timestamp = datetime(int(s[0:4]), int(s[4:6]), int(s[6:8]),
+                                     int(s[9:11]), int(s[11:13]), int(s[13:15]))
+            elif s.endswith('Z'):
+                timestamp = datetime.fromisoformat(s[:-1] + '+00:00')
             else:
-                timestamp = datetime.strptime(timestamp_str, '%Y%m%dT%H%M%S')
+                timestamp = datetime.fromisoformat(s)
         except:
             timestamp = datetime.now()
         
-        # Analyze sentiment
+        # Sentiment is scored in batch by get_market_news
         full_text = f"{title} {summary}"
-        sentiment_score = self.sentiment_analyzer.analyze_text_sentiment(full_text)
         
         # Calculate relevance score
-        relevance_score = self._calculate_relevance_score(full_text, symbols)
+        relevance_score = self._calculate_relevance_score(full_text, symbols, mentions)
         
         return MarketNews(
             title=title,
@@ -251,42 +496,62 @@ class NewsMonitor:
             source=source,
             timestamp=timestamp,
             symbols_mentioned=symbols,
-            sentiment_score=sentiment_score,
+            sentiment_score=0.0,
             relevance_score=relevance_score
         )
     
-    def _calculate_relevance_score(self, text: str, symbols: List[str]) -> float:
-        """Calculate how relevant the news is (0-1)"""
-        text_lower = text.lower()
+    def _count_mentions(self, text: str, scanner: re.Pattern) -> Counter:
+        """Count symbol and keyword hits in a single pass over the text (scanner from _mention_scanner)"""
+        return Counter(match.lower() for match in scanner.findall(text))
+    
+    def _calculate_relevance_score(self, text: str, symbols: List[str],
+                                   mentions: Optional[Counter] = None) -> float:
+        """Calculate how relevant the news is (0-1), from mentions when the text was already scanned"""
+        key = (text, tuple(symbols))
+        cached = self._relevance_cache.get(key)
+        if cached is not None:
+            return cached
+        
+        if mentions is None:
+            mentions = self._count_mentions(text, _mention_scanner(frozenset(symbols)))
         relevance = 0.0
         
         # Symbol mentions
         for symbol in symbols:
-            symbol_mentions = text_lower.count(symbol.lower())
-            relevance += min(0.3, symbol_mentions * 0.1)
-        
-        # Financial keywords
-        financial_keywords = ['earnings', 'revenue', 'profit', 'loss', 'guidance', 'forecast',
-                             'merger', 'acquisition', 'ipo', 'dividend', 'split', 'buyback']
+            relevance += min(0.3, mentions[symbol.lower()] * 0.1)
         
-        for keyword in financial_keywords:
-            if keyword in text_lower:
-                relevance += 0.05
+        # Financial keywords (each distinct keyword counts once)
+        relevance += sum(0.05 for keyword in RELEVANCE_KEYWORDS if keyword in mentions)
         
-        return min(1.0, relevance)
+        relevance = min(1.0, relevance)
+        self._relevance_cache[key] = relevance
+        if len(self._relevance_cache) > SCORE_CACHE_SIZE:
+            del self._relevance_cache[next(iter(self._relevance_cache))]
+        return relevance
     
     def _deduplicate_news(self, news_items: List[MarketNews]) -> List[MarketNews]:
-        """Remove duplicate news items"""
+        """Remove duplicate and near-duplicate news items (first one wins)"""
         seen_titles = set()
+        band_buckets = [dict() for _ in range(_MINHASH_BANDS)]
         unique_items = []
         
         for item in news_items:
-            # Create a simplified title for comparison
-            simple_title = re.sub(r'[^\w\s]', '', item.title.lower())
+            # Exact duplicates: same title tokens ignoring case and punctuation
+            tokens = tuple(_PUNCT_RE.sub('', item.title.lower()).split())
+            if tokens in seen_titles:
+                continue
+            seen_titles.add(tokens)
             
-            if simple_title not in seen_titles:
-                seen_titles.add(simple_title)
-                unique_items.append(item)
+            # Near duplicates: MinHash LSH candidates above the similarity threshold
+            signature = _minhash_signature(' '.join(tokens))
+            bands = [band.tobytes() for band in np.split(signature, _MINHASH_BANDS)]
+            candidates = [buckets[band] for buckets, band in zip(band_buckets, bands) if band in buckets]
+            if any(np.mean(signature == other) >= _NEAR_DUPLICATE_THRESHOLD for other in candidates):
+                continue
+            
+            for buckets, band in zip(band_buckets, bands):
+                buckets.setdefault(band, signature)
+            unique_items.append(item)
         
         return unique_items
 
@@ -320,23 +585,32 @@ class AlertSystem:
             if positions_df.empty:
                 return alerts
             
-            # Check position-level alerts
-            for _, position in positions_df.iterrows():
-                symbol = position['Symbol']
-                
-                # Large unrealized loss alert
-                if position['Unrealized PnL'] < 0:
-                    loss_pct = position['Unrealized PnL'] / abs(position['Market Value'])
-                    if loss_pct <= self.alert_rules['position_loss']:
-                        alerts.append(MarketAlert(
-                            alert_type='Position Loss',
-                            symbol=symbol,
-                            message=f'{symbol} down {abs(loss_pct):.1%} (${position["Unrealized PnL"]:,.2f})',
-                            priority='HIGH',
-                            timestamp=datetime.now(),
-                            data={'loss_pct': loss_pct, 'loss_amount': position['Unrealized PnL']},
-                            action_suggested='Consider stop-loss or position review'
-                        ))
+            # Check position-level alerts (vectorized; alerts built only for offenders)
+            pnl = positions_df['Unrealized PnL'].to_numpy(dtype=np.float64)
+            market_value = positions_df['Market Value'].to_numpy(dtype=np.float64)
+            threshold = self.alert_rules['position_loss']
+            
+            # Large unrealized loss alert
+            if NUMBA_AVAILABLE and len(pnl) > _PARALLEL_SCAN_MIN_POSITIONS:
+                loss_mask = _scan_positions(pnl, market_value, threshold)
+            else:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    loss_pct = np.where(market_value != 0, pnl / np.abs(market_value), 0.0)
+                loss_mask = (pnl < 0) & (loss_pct <= threshold)
+            
+            symbols = positions_df['Symbol'].to_numpy()
+            for idx in np.flatnonzero(loss_mask):
+                symbol = symbols[idx]
+                loss = float(pnl[idx] / abs(market_value[idx]))
+                alerts.append(MarketAlert(
+                    alert_type='Position Loss',
+                    symbol=symbol,
+                    message=f'{symbol} down {abs(loss):.1%} (${pnl[idx]:,.2f})',
+                    priority='HIGH',
+                    timestamp=datetime.now(),
+                    data={'loss_pct': loss, 'loss_amount': float(pnl[idx])},
+                    action_suggested='Consider stop-loss or position review'
+                ))
             
             # Check account-level alerts
             if account_summary:
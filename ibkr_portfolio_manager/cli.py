@@ -5,11 +5,16 @@ Command Line Interface for IBKR Portfolio Manager
 
 import argparse
 import asyncio
+import importlib.util
 import sys
 import json
 from datetime import datetime
 from pathlib import Path
 
+# Arrow's C++ writers are used for saved files when available; imported on
+# first write so commands that save nothing start faster
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
 # Import our modules
 try:
     from main import IBKRPortfolioManager
@@ -21,11 +26,25 @@ except ImportError as e:
 
 class IBKRPortfolioCLI:
     def __init__(self):
-        self.config = get_config('ibkr')
+        self.config = dict(get_config('ibkr'))  # Local copy; --port overrides it
         self.pm = None
+        self.session_active = False  # Keep one connection across commands
+    
+    async def __aenter__(self):
+        """Open a connection shared by every command run inside the block"""
+        self.session_active = True
+        await self.connect_manager()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.session_active = False
+        self.release_manager()
     
     async def connect_manager(self, port=None):
         """Connect to portfolio manager"""
+        if self.session_active and self.pm is not None and self.pm.connected:
+            return True
+        
         if port:
             self.config['port'] = port
         
@@ -44,6 +63,11 @@ class IBKRPortfolioCLI:
         print(f"✅ Connected to IBKR at {self.config['host']}:{self.config['port']}")
         return True
     
+    def release_manager(self):
+        """Disconnect unless a session is keeping the connection open"""
+        if self.pm is not None and not self.session_active:
+            self.pm.disconnect()
+    
     async def show_summary(self):
         """Show account summary"""
         if not await self.connect_manager():
@@ -70,9 +94,9 @@ class IBKRPortfolioCLI:
                 print("  No account summary available")
                 
         finally:
-            self.pm.disconnect()
+            self.release_manager()
     
-    async def show_positions(self, save_to_file=False):
+    async def show_positions(self, save_to_file=False, file_format='csv'):
         """Show portfolio positions"""
         if not await self.connect_manager():
             return
@@ -98,14 +122,25 @@ class IBKRPortfolioCLI:
                 
                 if save_to_file:
                     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                    filename = f"positions_{timestamp}.csv"
-                    positions_df.to_csv(filename, index=False)
+                    filename = f"positions_{timestamp}.{file_format}"
+                    self._write_positions(positions_df, filename, file_format)
                     print(f"  💾 Saved to: {filename}")
             else:
                 print("  No positions found")
                 
         finally:
-            self.pm.disconnect()
+            self.release_manager()
+    
+    def _write_positions(self, positions_df, filename, file_format='csv'):
+        """Write positions to CSV or Parquet"""
+        if file_format == 'parquet':
+            positions_df.to_parquet(filename, index=False)
+        elif PYARROW_AVAILABLE:
+            import pyarrow as pa
+            import pyarrow.csv as pacsv
+            pacsv.write_csv(pa.Table.from_pandas(positions_df, preserve_index=False), filename)
+        else:
+            positions_df.to_csv(filename, index=False)
     
     async def show_orders(self):
         """Show open orders"""
@@ -125,7 +160,7 @@ class IBKRPortfolioCLI:
                 print("  No open orders")
                 
         finally:
-            self.pm.disconnect()
+            self.release_manager()
     
     async def save_snapshot(self, filename=None):
         """Save portfolio snapshot"""
@@ -141,11 +176,21 @@ class IBKRPortfolioCLI:
                 # Show file size
                 file_size = Path(snapshot_file).stat().st_size
                 print(f"   File size: {file_size:,} bytes")
+                
+                # Parquet footers record the uncompressed column sizes
+                if PYARROW_AVAILABLE and snapshot_file.lower().endswith('.parquet'):
+                    import pyarrow.parquet as pq
+                    metadata = pq.read_metadata(snapshot_file)
+                    raw_size = sum(metadata.row_group(i).total_byte_size
+                                   for i in range(metadata.num_row_groups))
+                    if raw_size:
+                        print(f"   Compression ratio: {raw_size / file_size:.1f}x "
+                              f"({raw_size:,} bytes uncompressed)")
             else:
                 print("❌ Failed to save snapshot")
                 
         finally:
-            self.pm.disconnect()
+            self.release_manager()
     
     async def monitor_portfolio(self, interval=30):
         """Start portfolio monitoring"""
@@ -155,11 +200,11 @@ class IBKRPortfolioCLI:
         try:
             print(f"🔄 Starting portfolio monitoring (refresh every {interval}s)")
             print("Press Ctrl+C to stop...")
-            self.pm.monitor_portfolio(refresh_interval=interval)
+            await self.pm.monitor_portfolio(refresh_interval=interval)
         except KeyboardInterrupt:
             print("\n⏹️  Monitoring stopped by user")
         finally:
-            self.pm.disconnect()
+            self.release_manager()
     
     async def test_connection(self, port=None):
         """Test connection to IBKR"""
@@ -178,7 +223,7 @@ class IBKRPortfolioCLI:
             except Exception as e:
                 print(f"⚠️  Connected but error getting data: {e}")
             
-            self.pm.disconnect()
+            self.release_manager()
         else:
             print("❌ Connection failed")
             print("\nTroubleshooting tips:")
@@ -187,6 +232,39 @@ class IBKRPortfolioCLI:
             print("3. Verify the port number (7497 for paper, 7496 for live)")
             print("4. Ensure 'Enable ActiveX and Socket Clients' is checked")
 
+    async def repl(self):
+        """Run commands interactively over a single connection"""
+        async with self:
+            if self.pm is None or not self.pm.connected:
+                return
+            
+            print("Commands: summary, positions [--save], orders, snapshot [file], quit")
+            loop = asyncio.get_running_loop()
+            
+            while True:
+                try:
+                    line = await loop.run_in_executor(None, input, "ibkr> ")
+                except (EOFError, KeyboardInterrupt):
+                    break
+                
+                parts = line.split()
+                if not parts:
+                    continue
+                command, args = parts[0], parts[1:]
+                
+                if command in ('quit', 'exit'):
+                    break
+                elif command == 'summary':
+                    await self.show_summary()
+                elif command == 'positions':
+                    await self.show_positions(save_to_file='--save' in args)
+                elif command == 'orders':
+                    await self.show_orders()
+                elif command == 'snapshot':
+                    await self.save_snapshot(args[0] if args else None)
+                else:
+                    print(f"Unknown command: {command}")
+
 def main():
     parser = argparse.ArgumentParser(description="IBKR Portfolio Manager CLI")
     parser.add_argument('--port', type=int, help='IBKR port (7497 for paper, 7496 for live)')
@@ -201,14 +279,19 @@ def main():
     
     # Positions command
     pos_parser = subparsers.add_parser('positions', help='Show portfolio positions')
-    pos_parser.add_argument('--save', action='store_true', help='Save positions to CSV file')
+    pos_parser.add_argument('--save', action='store_true', help='Save positions to file')
+    pos_parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                            help='File format for --save (default: csv)')
     
     # Orders command
     subparsers.add_parser('orders', help='Show open orders')
     
     # Snapshot command
     snap_parser = subparsers.add_parser('snapshot', help='Save portfolio snapshot')
-    snap_parser.add_argument('--file', help='Output filename')
+    snap_parser.add_argument('--file', help='Output filename (.parquet for Zstd Parquet, .npz for NumPy arrays, otherwise JSON)')
+    
+    # Interactive command
+    subparsers.add_parser('repl', help='Run several commands over one connection')
     
     # Monitor command
     mon_parser = subparsers.add_parser('monitor', help='Start portfolio monitoring')
@@ -223,20 +306,24 @@ def main():
     # Create CLI instance
     cli = IBKRPortfolioCLI()
     
-    # Execute command
+    # Execute command. Commands stay on the stock asyncio loop: ib_insync's
+    # blocking helpers (e.g. accountSummary) re-enter the running loop through
+    # nest_asyncio, which cannot patch uvloop loops.
     try:
         if args.command == 'test':
             asyncio.run(cli.test_connection(args.port))
         elif args.command == 'summary':
             asyncio.run(cli.show_summary())
         elif args.command == 'positions':
-            asyncio.run(cli.show_positions(save_to_file=args.save))
+            asyncio.run(cli.show_positions(save_to_file=args.save, file_format=args.format))
         elif args.command == 'orders':
             asyncio.run(cli.show_orders())
         elif args.command == 'snapshot':
             asyncio.run(cli.save_snapshot(args.file))
         elif args.command == 'monitor':
             asyncio.run(cli.monitor_portfolio(args.interval))
+        elif args.command == 'repl':
+            asyncio.run(cli.repl())
         else:
             print(f"Unknown command: {args.command}")
             parser.print_help()
@@ -3,7 +3,9 @@ Configuration file for IBKR Portfolio Manager
 """
 
 import os
-from typing import Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
 
 # IBKR Connection Settings
 IBKR_CONFIG = {
@@ -19,6 +21,7 @@ MONITORING_CONFIG = {
     'save_snapshots': True,
     'snapshot_interval': 300,  # seconds between automatic snapshots (5 minutes)
     'snapshot_directory': 'snapshots',
+    'history_cache_directory': 'cache',  # Parquet daily bars used by risk analysis
     'log_directory': 'logs'
 }
 
@@ -62,7 +65,7 @@ ALERT_CONFIG = {
 # Data Export Settings
 EXPORT_CONFIG = {
     'auto_export': False,
-    'export_format': 'json',  # json, csv, excel
+    'export_format': 'json',  # json, csv, excel, parquet
     'export_frequency': 'daily',  # hourly, daily, weekly
     'include_historical_data': True
 }
@@ -72,10 +75,23 @@ RISK_CONFIG = {
     'max_position_size_pct': 0.1,  # Max 10% of portfolio in single position
     'max_daily_loss_pct': 0.02,   # Max 2% daily loss
     'max_sector_exposure_pct': 0.25,  # Max 25% in single sector
-    'enable_position_limits': False
+    'enable_position_limits': False,
+    'alert_database': 'risk_alerts.db'  # SQLite history of recent risk alerts
 }
 
-def get_config(section: str = None) -> Dict[str, Any]:
+# Mutable section dicts behind get_config/update_config
+_CONFIG_SECTIONS = {
+    'ibkr': IBKR_CONFIG,
+    'monitoring': MONITORING_CONFIG,
+    'logging': LOGGING_CONFIG,
+    'display': DISPLAY_CONFIG,
+    'alerts': ALERT_CONFIG,
+    'export': EXPORT_CONFIG,
+    'risk': RISK_CONFIG
+}
+
+@lru_cache(maxsize=16)
+def get_config(section: Optional[str] = None) -> Mapping[str, Any]:
     """
     Get configuration settings
     
@@ -84,36 +100,18 @@ def get_config(section: str = None) -> Dict[str, Any]:
                 If None, returns all configs
     
     Returns:
-        Dictionary containing configuration settings
+        Read-only mapping containing configuration settings (copy with dict()
+        to modify locally; use update_config to change a setting)
     """
-    all_configs = {
-        'ibkr': IBKR_CONFIG,
-        'monitoring': MONITORING_CONFIG,
-        'logging': LOGGING_CONFIG,
-        'display': DISPLAY_CONFIG,
-        'alerts': ALERT_CONFIG,
-        'export': EXPORT_CONFIG,
-        'risk': RISK_CONFIG
-    }
-    
     if section:
-        return all_configs.get(section, {})
-    return all_configs
+        return MappingProxyType(_CONFIG_SECTIONS.get(section, {}))
+    return MappingProxyType({name: MappingProxyType(values) for name, values in _CONFIG_SECTIONS.items()})
 
 def update_config(section: str, key: str, value: Any):
     """Update a configuration value"""
-    configs = {
-        'ibkr': IBKR_CONFIG,
-        'monitoring': MONITORING_CONFIG,
-        'logging': LOGGING_CONFIG,
-        'display': DISPLAY_CONFIG,
-        'alerts': ALERT_CONFIG,
-        'export': EXPORT_CONFIG,
-        'risk': RISK_CONFIG
-    }
-    
-    if section in configs and key in configs[section]:
-        configs[section][key] = value
+    if section in _CONFIG_SECTIONS and key in _CONFIG_SECTIONS[section]:
+        _CONFIG_SECTIONS[section][key] = value
+        get_config.cache_clear()
         return True
     return False
 
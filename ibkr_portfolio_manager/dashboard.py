@@ -4,19 +4,65 @@ Working IBKR Dashboard - No f-string syntax issues
 All JavaScript curly braces properly escaped
 """
 
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
+from flask.json.provider import JSONProvider
 from flask_socketio import SocketIO, emit
 import asyncio
+import gzip
+import hashlib
+import logging
+import operator
 import threading
-import time
 from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import orjson
 
 from main import IBKRPortfolioManager
 from config import get_config
 
+logger = logging.getLogger(__name__)
+
+# Numeric Position attributes, in the column order used by update_data
+POSITION_FIELDS = ('position', 'marketPrice', 'marketValue', 'averageCost', 'unrealizedPNL')
+
+# Read all attributes in one C call; getattr with defaults is the fallback
+_POS_GET = operator.attrgetter('contract', *POSITION_FIELDS)
+_CON_GET = operator.attrgetter('symbol', 'secType')
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+class _OrjsonSocketSerializer:
+    """json-module stand-in for Socket.IO packets (orjson returns bytes)"""
+    
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj, default=str).decode('utf-8')
+    
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'working-dashboard-2024'
-socketio = SocketIO(app, cors_allowed_origins="*")
+app.json = OrjsonProvider(app)
+# Threading mode on purpose: IBKR calls run on the native asyncio loop below, and
+# eventlet/gevent monkey-patching breaks that loop and cross-thread futures.
+# Without an explicit mode Flask-SocketIO would pick eventlet whenever installed.
+socketio = SocketIO(app, async_mode='threading', json=_OrjsonSocketSerializer,
+                    cors_allowed_origins="*")
+
+# One event loop for all IBKR work, so the connection outlives each request
+LOOP = asyncio.new_event_loop()
+threading.Thread(target=LOOP.run_forever, daemon=True, name='ibkr-loop').start()
 
 class WorkingDashboard:
     def __init__(self):
@@ -24,6 +70,11 @@ class WorkingDashboard:
         self.connected = False
         self.monitoring = False
         self.latest_data = {}
+        self.interval = 5  # Seconds between background data updates
+        self._update_task = None  # In-flight update; concurrent callers await it
+        self._last_hash = None  # Fingerprint of the last broadcast snapshot
+        self._prev_by_key = None  # Last broadcast positions keyed by (Symbol, SecType)
+        self._seq = 0  # Broadcast sequence number; clients resync on gaps
         
     async def connect_to_ibkr(self):
         try:
@@ -50,13 +101,40 @@ class WorkingDashboard:
             print(f"❌ Connection error: {e}")
             return False
     
+    async def _poller(self):
+        """Refresh data in the background while connected"""
+        self.monitoring = True
+        try:
+            while self.connected:
+                await self.update_data()
+                await asyncio.sleep(self.interval)
+        finally:
+            self.monitoring = False
+    
     async def update_data(self):
+        """
+        Update data and return the latest snapshot
+        
+        Calls made while an update is running await that update and share its
+        IBKR request instead of starting another one.
+        """
+        if self._update_task is None or self._update_task.done():
+            self._update_task = asyncio.ensure_future(self._collect_data())
+        # Shielded so a caller that times out does not cancel the shared update
+        await asyncio.shield(self._update_task)
+        return self.latest_data
+    
+    async def _collect_data(self):
         """Update data with comprehensive error handling"""
         if not self.connected or not self.pm:
             return
         
         try:
-            print(f"🔄 [{time.strftime('%H:%M:%S')}] Starting data update...")
+            # One clock read per update, reused for every timestamp below
+            now = datetime.now()
+            now_iso = now.isoformat()
+            now_hms = now.strftime('%H:%M:%S')
+            print(f"🔄 [{now_hms}] Starting data update...")
             
             # Get account summary
             account_summary = {}
@@ -82,55 +160,57 @@ class WorkingDashboard:
                 raw_positions = self.pm.ib.positions()
                 print(f"📈 Found {len(raw_positions)} raw positions")
                 
+                # Read the numeric fields row by row, then fill gaps in one vectorized pass
+                rows = []
+                values = []
                 for i, pos in enumerate(raw_positions):
+                    # Get contract info safely
                     try:
-                        print(f"  🔍 Processing position {i+1}...")
-                        
-                        # Get contract info safely
+                        contract, *raw_values = _POS_GET(pos)
+                    except AttributeError:
                         contract = getattr(pos, 'contract', None)
-                        if not contract:
-                            continue
-                        
-                        symbol = getattr(contract, 'symbol', f'UNKNOWN_{i+1}')
-                        sec_type = getattr(contract, 'secType', 'Unknown')
-                        
-                        # Get position data safely
-                        position_size = getattr(pos, 'position', 0)
-                        market_price = getattr(pos, 'marketPrice', None)
-                        market_value = getattr(pos, 'marketValue', None)
-                        average_cost = getattr(pos, 'averageCost', None)
-                        unrealized_pnl = getattr(pos, 'unrealizedPNL', None)
-                        
-                        # Convert to float with defaults
-                        market_price = float(market_price) if market_price is not None else 0.0
-                        market_value = float(market_value) if market_value is not None else 0.0
-                        average_cost = float(average_cost) if average_cost is not None else 0.0
-                        unrealized_pnl = float(unrealized_pnl) if unrealized_pnl is not None else 0.0
-                        
-                        # Calculate missing values
-                        if market_value == 0.0 and market_price > 0 and position_size != 0:
-                            market_value = market_price * abs(position_size)
-                        
-                        if market_price == 0.0 and market_value > 0 and position_size != 0:
-                            market_price = market_value / abs(position_size)
-                        
-                        position_data = {
-                            'Symbol': symbol,
-                            'SecType': sec_type,
-                            'Position': position_size,
-                            'Market Price': market_price,
-                            'Market Value': market_value,
-                            'Average Cost': average_cost,
-                            'Unrealized PnL': unrealized_pnl
-                        }
-                        
-                        positions.append(position_data)
-                        print(f"    ✅ {symbol}: {position_size} @ ${market_price:.2f}")
-                        
-                    except Exception as pos_error:
+                        raw_values = [getattr(pos, field, None) for field in POSITION_FIELDS]
+                    if not contract:
+                        continue
+                    
+                    try:
+                        values.append([float(raw or 0.0) for raw in raw_values])
+                    except (TypeError, ValueError) as pos_error:
                         error_msg = f"Position {i+1}: {str(pos_error)}"
                         positions_errors.append(error_msg)
-                        print(f"    ❌ {error_msg}")
+                        logger.debug("position error: %s", error_msg)
+                        continue
+                    
+                    try:
+                        rows.append(_CON_GET(contract))
+                    except AttributeError:
+                        rows.append((
+                            getattr(contract, 'symbol', f'UNKNOWN_{i+1}'),
+                            getattr(contract, 'secType', 'Unknown')
+                        ))
+                
+                numbers = np.array(values, dtype=np.float64).reshape(-1, len(POSITION_FIELDS))
+                size, price, value, cost, pnl = numbers.T
+                
+                # Calculate missing values
+                held = size != 0
+                fill_value = (value == 0.0) & (price > 0) & held
+                value[fill_value] = price[fill_value] * np.abs(size[fill_value])
+                fill_price = (price == 0.0) & (value > 0) & held
+                price[fill_price] = value[fill_price] / np.abs(size[fill_price])
+                
+                positions = [
+                    {
+                        'Symbol': symbol,
+                        'SecType': sec_type,
+                        'Position': float(size[i]),
+                        'Market Price': float(price[i]),
+                        'Market Value': float(value[i]),
+                        'Average Cost': float(cost[i]),
+                        'Unrealized PnL': float(pnl[i])
+                    }
+                    for i, (symbol, sec_type) in enumerate(rows)
+                ]
                 
                 print(f"✅ Processed {len(positions)} positions, {len(positions_errors)} errors")
                 
@@ -141,18 +221,45 @@ class WorkingDashboard:
             self.latest_data = {
                 'account_summary': account_summary,
                 'positions': positions,
-                'last_update': datetime.now().isoformat(),
+                'last_update': now_iso,
+                'seq': self._seq,
                 'debug_info': {
                     'account_items': len(account_summary),
                     'positions_count': len(positions),
                     'positions_errors': positions_errors,
                     'connected': self.connected,
-                    'timestamp': time.strftime('%H:%M:%S')
+                    'timestamp': now_hms
                 }
             }
             
-            # Send to clients
-            socketio.emit('portfolio_update', self.latest_data)
+            # Send to clients only when the portfolio changed
+            snapshot_hash = hashlib.blake2b(
+                orjson.dumps({'account_summary': account_summary, 'positions': positions},
+                             option=orjson.OPT_SORT_KEYS, default=str),
+                digest_size=16
+            ).digest()
+            if snapshot_hash == self._last_hash:
+                socketio.emit('heartbeat', {'t': self.latest_data['last_update']})
+                return
+            
+            self._last_hash = snapshot_hash
+            self._seq += 1
+            self.latest_data['seq'] = self._seq
+            
+            # Send only changed rows once clients have a full snapshot
+            by_key = {(p['Symbol'], p['SecType']): p for p in positions}
+            if self._prev_by_key is None:
+                socketio.emit('portfolio_update', self.latest_data)
+            else:
+                socketio.emit('portfolio_delta', {
+                    'upserts': [p for key, p in by_key.items() if self._prev_by_key.get(key) != p],
+                    'removed': [list(key) for key in self._prev_by_key if key not in by_key],
+                    'seq': self._seq,
+                    'account_summary': account_summary,
+                    'last_update': now_iso,
+                    'debug_info': self.latest_data['debug_info']
+                })
+            self._prev_by_key = by_key
             print("✅ Data update complete!")
             
         except Exception as e:
@@ -161,378 +268,49 @@ class WorkingDashboard:
 # Global dashboard
 dashboard = WorkingDashboard()
 
-# HTML template without f-string conflicts
-def get_html():
-    current_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    
-    html_template = """<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>IBKR Dashboard - Working Version</title>
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/socket.io/4.0.0/socket.io.js"></script>
-    
-    <meta http-equiv="Cache-Control" content="no-cache, no-store, must-revalidate">
-    <meta http-equiv="Pragma" content="no-cache">
-    <meta http-equiv="Expires" content="0">
-    
-    <style>
-        .status-connected { color: #28a745; font-weight: bold; }
-        .status-disconnected { color: #dc3545; font-weight: bold; }
-        .status-connecting { color: #ffc107; font-weight: bold; }
-        .debug-section { font-family: monospace; font-size: 12px; max-height: 300px; overflow-y: auto; }
-        .positive { color: #28a745; font-weight: bold; }
-        .negative { color: #dc3545; font-weight: bold; }
-        .metric-card { transition: all 0.3s ease; }
-        .metric-card:hover { transform: translateY(-2px); }
-    </style>
-</head>
-<body class="bg-light">
-    <div class="container-fluid p-4">
-        <!-- Header -->
-        <div class="row mb-4">
-            <div class="col-12 text-center">
-                <h1 class="mb-2">📊 IBKR Portfolio Dashboard</h1>
-                <p class="text-muted">Working Version - """ + current_time + """</p>
-            </div>
-        </div>
-        
-        <!-- Connection Status -->
-        <div class="row mb-4">
-            <div class="col-12">
-                <div class="card">
-                    <div class="card-body text-center">
-                        <h5>Connection Status: <span id="connectionStatus" class="status-disconnected">Disconnected</span></h5>
-                        
-                        <button id="connectButton" class="btn btn-success me-2" onclick="connectToIBKR()">
-                            🔌 Connect to IBKR
-                        </button>
-                        <button id="refreshButton" class="btn btn-primary me-2" onclick="refreshData()" disabled>
-                            🔄 Refresh Data
-                        </button>
-                        <button class="btn btn-info me-2" onclick="showDebugInfo()">
-                            🔍 Debug Info
-                        </button>
-                        <button class="btn btn-secondary" onclick="window.open('/api/debug', '_blank')">
-                            🔧 Raw Data
-                        </button>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Account Summary -->
-        <div class="row mb-4">
-            <div class="col-md-3">
-                <div class="card bg-primary text-white metric-card">
-                    <div class="card-body text-center">
-                        <h6>💰 Net Liquidation</h6>
-                        <h3 id="netLiquidation">$0.00</h3>
-                    </div>
-                </div>
-            </div>
-            <div class="col-md-3">
-                <div class="card bg-success text-white metric-card">
-                    <div class="card-body text-center">
-                        <h6>💵 Total Cash</h6>
-                        <h3 id="totalCash">$0.00</h3>
-                    </div>
-                </div>
-            </div>
-            <div class="col-md-3">
-                <div class="card bg-info text-white metric-card">
-                    <div class="card-body text-center">
-                        <h6>📈 Buying Power</h6>
-                        <h3 id="buyingPower">$0.00</h3>
-                    </div>
-                </div>
-            </div>
-            <div class="col-md-3">
-                <div class="card bg-warning text-dark metric-card">
-                    <div class="card-body text-center">
-                        <h6>📊 Unrealized P&L</h6>
-                        <h3 id="unrealizedPnL">$0.00</h3>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Positions Table -->
-        <div class="row mb-4">
-            <div class="col-12">
-                <div class="card">
-                    <div class="card-header">
-                        <h6 class="mb-0">📋 Portfolio Positions</h6>
-                    </div>
-                    <div class="card-body">
-                        <div class="table-responsive">
-                            <table class="table table-striped">
-                                <thead class="table-dark">
-                                    <tr>
-                                        <th>Symbol</th>
-                                        <th>Type</th>
-                                        <th>Position</th>
-                                        <th>Market Price</th>
-                                        <th>Market Value</th>
-                                        <th>Unrealized P&L</th>
-                                    </tr>
-                                </thead>
-                                <tbody id="positionsTableBody">
-                                    <tr>
-                                        <td colspan="6" class="text-center text-muted py-4">
-                                            Connect to IBKR to view positions
-                                        </td>
-                                    </tr>
-                                </tbody>
-                            </table>
-                        </div>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Debug Section -->
-        <div class="row mb-4">
-            <div class="col-12">
-                <div class="card">
-                    <div class="card-header">
-                        <h6 class="mb-0">🔍 Debug Information</h6>
-                    </div>
-                    <div class="card-body debug-section">
-                        <pre id="debugInfo">Click "Debug Info" to view system information</pre>
-                    </div>
-                </div>
-            </div>
-        </div>
-        
-        <!-- Status Messages -->
-        <div id="messageArea" class="mt-3"></div>
-    </div>
 
-    <script>
-        console.log('Dashboard JavaScript loading...');
-        
-        let socket = null;
-        let isConnected = false;
-        let currentData = null;
-        
-        // Initialize when DOM is ready
-        document.addEventListener('DOMContentLoaded', function() {
-            console.log('DOM ready, initializing dashboard...');
-            initializeSocket();
-            showMessage('Dashboard loaded successfully!', 'success');
-        });
-        
-        // Initialize WebSocket
-        function initializeSocket() {
-            try {
-                socket = io();
-                
-                socket.on('connect', function() {
-                    console.log('WebSocket connected');
-                    showMessage('Connected to server', 'info');
-                });
-                
-                socket.on('disconnect', function() {
-                    console.log('WebSocket disconnected');
-                    showMessage('Disconnected from server', 'warning');
-                });
-                
-                socket.on('portfolio_update', function(data) {
-                    console.log('Portfolio update received:', data);
-                    updateDashboard(data);
-                });
-                
-            } catch (error) {
-                console.error('Socket initialization error:', error);
-                showMessage('WebSocket initialization failed: ' + error.message, 'danger');
-            }
-        }
-        
-        // Connect to IBKR
-        async function connectToIBKR() {
-            console.log('Connect button clicked');
-            
-            const connectButton = document.getElementById('connectButton');
-            const statusElement = document.getElementById('connectionStatus');
-            
-            try {
-                connectButton.disabled = true;
-                connectButton.textContent = 'Connecting...';
-                statusElement.textContent = 'Connecting...';
-                statusElement.className = 'status-connecting';
-                
-                showMessage('Connecting to IBKR...', 'info');
-                
-                const response = await fetch('/api/connect', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' }
-                });
-                
-                const result = await response.json();
-                console.log('Connection result:', result);
-                
-                if (result.success) {
-                    isConnected = true;
-                    statusElement.textContent = 'Connected';
-                    statusElement.className = 'status-connected';
-                    connectButton.textContent = 'Connected';
-                    document.getElementById('refreshButton').disabled = false;
-                    showMessage('Successfully connected to IBKR!', 'success');
-                } else {
-                    throw new Error(result.error || 'Connection failed');
-                }
-                
-            } catch (error) {
-                console.error('Connection error:', error);
-                statusElement.textContent = 'Failed';
-                statusElement.className = 'status-disconnected';
-                showMessage('Connection failed: ' + error.message, 'danger');
-            } finally {
-                connectButton.disabled = false;
-                connectButton.textContent = 'Connect to IBKR';
-            }
-        }
-        
-        // Refresh data
-        async function refreshData() {
-            if (!isConnected) {
-                showMessage('Please connect first', 'warning');
-                return;
-            }
-            
-            const refreshButton = document.getElementById('refreshButton');
-            
-            try {
-                refreshButton.disabled = true;
-                refreshButton.textContent = 'Refreshing...';
-                
-                const response = await fetch('/api/refresh', { method: 'POST' });
-                const result = await response.json();
-                
-                if (result.success) {
-                    showMessage('Data refreshed!', 'success');
-                } else {
-                    throw new Error(result.error);
-                }
-                
-            } catch (error) {
-                showMessage('Refresh failed: ' + error.message, 'danger');
-            } finally {
-                refreshButton.disabled = false;
-                refreshButton.textContent = 'Refresh Data';
-            }
-        }
-        
-        // Show debug info
-        async function showDebugInfo() {
-            try {
-                const response = await fetch('/api/debug');
-                const data = await response.json();
-                document.getElementById('debugInfo').textContent = JSON.stringify(data, null, 2);
-                showMessage('Debug info updated', 'info');
-            } catch (error) {
-                showMessage('Debug failed: ' + error.message, 'danger');
-            }
-        }
-        
-        // Update dashboard
-        function updateDashboard(data) {
-            console.log('Updating dashboard with data');
-            currentData = data;
-            
-            try {
-                // Update account summary
-                const summary = data.account_summary || {};
-                
-                document.getElementById('netLiquidation').textContent = 
-                    formatCurrency(summary.NetLiquidation ? summary.NetLiquidation.value : 0);
-                document.getElementById('totalCash').textContent = 
-                    formatCurrency(summary.TotalCashValue ? summary.TotalCashValue.value : 0);
-                document.getElementById('buyingPower').textContent = 
-                    formatCurrency(summary.BuyingPower ? summary.BuyingPower.value : 0);
-                
-                const unrealizedPnL = summary.UnrealizedPnL ? parseFloat(summary.UnrealizedPnL.value) : 0;
-                const unrealizedElement = document.getElementById('unrealizedPnL');
-                unrealizedElement.textContent = formatCurrency(unrealizedPnL);
-                unrealizedElement.className = unrealizedPnL >= 0 ? 'positive' : 'negative';
-                
-                // Update positions table
-                updatePositionsTable(data.positions || []);
-                
-                showMessage('Dashboard updated: ' + (data.positions ? data.positions.length : 0) + ' positions', 'success');
-                
-            } catch (error) {
-                console.error('Dashboard update error:', error);
-                showMessage('Update failed: ' + error.message, 'danger');
-            }
-        }
-        
-        // Update positions table
-        function updatePositionsTable(positions) {
-            const tbody = document.getElementById('positionsTableBody');
-            
-            if (!positions || positions.length === 0) {
-                tbody.innerHTML = '<tr><td colspan="6" class="text-center text-muted py-4">No positions found</td></tr>';
-                return;
-            }
-            
-            tbody.innerHTML = positions.map(function(pos) {
-                const unrealizedPnL = pos['Unrealized PnL'] || 0;
-                const pnlClass = unrealizedPnL >= 0 ? 'positive' : 'negative';
-                
-                return '<tr>' +
-                    '<td><strong>' + (pos.Symbol || 'N/A') + '</strong></td>' +
-                    '<td><span class="badge bg-secondary">' + (pos.SecType || 'N/A') + '</span></td>' +
-                    '<td>' + (pos.Position || 0) + '</td>' +
-                    '<td>' + formatCurrency(pos['Market Price'] || 0) + '</td>' +
-                    '<td>' + formatCurrency(pos['Market Value'] || 0) + '</td>' +
-                    '<td class="' + pnlClass + '">' + formatCurrency(unrealizedPnL) + '</td>' +
-                    '</tr>';
-            }).join('');
-        }
-        
-        // Format currency
-        function formatCurrency(value) {
-            const num = parseFloat(value) || 0;
-            return '$' + num.toLocaleString(undefined, {
-                minimumFractionDigits: 2,
-                maximumFractionDigits: 2
-            });
-        }
-        
-        // Show messages
-        function showMessage(message, type) {
-            const messageArea = document.getElementById('messageArea');
-            const alertClass = 'alert-' + (type === 'danger' ? 'danger' : 
-                                         type === 'success' ? 'success' : 
-                                         type === 'warning' ? 'warning' : 'info');
-            
-            const timestamp = new Date().toLocaleTimeString();
-            messageArea.innerHTML = '<div class="alert ' + alertClass + ' alert-dismissible fade show">' +
-                '<small>[' + timestamp + ']</small> ' + message +
-                '<button type="button" class="btn-close" data-bs-dismiss="alert"></button></div>';
-            
-            setTimeout(function() {
-                const alert = messageArea.querySelector('.alert');
-                if (alert) alert.remove();
-            }, 5000);
-        }
-        
-        console.log('Dashboard JavaScript loaded successfully');
-    </script>
-    
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-</body>
-</html>"""
-    
-    return html_template
+# The page lives in static/index.html; it is read (and gzipped) once at import.
+# A content-hash URL is served as immutable, and / revalidates by the same hash.
+_HTML_BYTES = (Path(app.static_folder) / 'index.html').read_bytes()
+_HTML_GZ = gzip.compress(_HTML_BYTES, 6)
+HTML_VERSION = hashlib.sha256(_HTML_BYTES).hexdigest()[:12]
+
+def _accepts_gzip() -> bool:
+    return 'gzip' in request.headers.get('Accept-Encoding', '')
+
+def _compressed(response: Response) -> Response:
+    """Gzip a JSON response when the client accepts it and it is worth it"""
+    response.headers['Vary'] = 'Accept-Encoding'
+    body = response.get_data()
+    if _accepts_gzip() and len(body) >= 1024:
+        response.set_data(gzip.compress(body, 6))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def _html_response(cache_control: str) -> Response:
+    if request.if_none_match.contains(HTML_VERSION):
+        response = Response(status=304)
+    elif _accepts_gzip():
+        response = Response(_HTML_GZ, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(_HTML_BYTES, mimetype='text/html')
+    response.set_etag(HTML_VERSION)
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @app.route('/')
 def index():
-    return get_html()
+    return _html_response('no-cache')
+
+@app.route(f'/dashboard.{HTML_VERSION}.html')
+def versioned_index():
+    return _html_response('public, max-age=31536000, immutable')
+
+@app.route('/api/server_time')
+def server_time():
+    return jsonify({'t': datetime.now().isoformat()})
 
 @app.route('/api/connect', methods=['POST'])
 def connect():
@@ -542,9 +320,12 @@ def connect():
         async def do_connect():
             return {'success': await dashboard.connect_to_ibkr()}
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(do_connect())
+        result = asyncio.run_coroutine_threadsafe(do_connect(), LOOP).result(timeout=30)
+        
+        # Keep data fresh in the background; clients read the cached snapshot
+        if result['success'] and not dashboard.monitoring:
+            dashboard.monitoring = True
+            asyncio.run_coroutine_threadsafe(dashboard._poller(), LOOP)
         
         return jsonify(result)
         
@@ -558,14 +339,12 @@ def refresh():
         if not dashboard.connected:
             return jsonify({'success': False, 'error': 'Not connected'})
         
-        async def do_refresh():
-            await dashboard.update_data()
-        
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(do_refresh())
-        
-        return jsonify({'success': True})
+        # The background poller keeps latest_data current; ?force=1 updates now
+        if request.args.get('force') == '1':
+            data = asyncio.run_coroutine_threadsafe(dashboard.update_data(), LOOP).result(timeout=30)
+        else:
+            data = dashboard.latest_data
+        return _compressed(jsonify({'success': True, 'data': data}))
         
     except Exception as e:
         print(f"❌ Refresh error: {e}")
@@ -574,14 +353,25 @@ def refresh():
 @app.route('/api/debug')
 def debug():
     try:
-        return jsonify({
-            'server_time': datetime.now().isoformat(),
-            'dashboard_connected': dashboard.connected,
-            'latest_data_available': bool(dashboard.latest_data),
-            'account_summary_count': len(dashboard.latest_data.get('account_summary', {})),
-            'positions_count': len(dashboard.latest_data.get('positions', [])),
-            'full_data': dashboard.latest_data
-        })
+        snapshot = dashboard.latest_data
+        
+        # seq only advances when the portfolio changes, so polls that find the
+        # same positions keep the same ETag
+        etag = f"{snapshot.get('seq', 0)}-{int(dashboard.connected)}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = _compressed(Response(orjson.dumps({
+                'server_time': datetime.now().isoformat(),
+                'dashboard_connected': dashboard.connected,
+                'latest_data_available': bool(snapshot),
+                'account_summary_count': len(snapshot.get('account_summary', {})),
+                'positions_count': len(snapshot.get('positions', [])),
+                'full_data': snapshot
+            }, default=str), mimetype='application/json'))
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         return jsonify({'error': str(e)})
 
@@ -589,6 +379,10 @@ def debug():
 def handle_connect():
     print('✅ Client connected')
     emit('status', {'connected': dashboard.connected})
+    
+    # New clients need a full snapshot before deltas apply
+    if dashboard.latest_data:
+        emit('portfolio_update', dashboard.latest_data)
 
 @socketio.on('disconnect')  
 def handle_disconnect():
@@ -597,6 +391,7 @@ def handle_disconnect():
 if __name__ == '__main__':
     print("🚀 Starting Working IBKR Dashboard...")
     print("📊 URL: http://localhost:5000")
+    print(f"📄 Cacheable page: http://localhost:5000/dashboard.{HTML_VERSION}.html")
     print("🛡️  No f-string syntax issues!")
     print("✅ Position attribute errors fixed")
     print("🔧 Ready to connect to TWS/Gateway")
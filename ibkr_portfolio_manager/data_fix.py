@@ -4,67 +4,121 @@ Better handling of account summary, positions, and data formatting
 """
 
 import asyncio
+import logging
 from datetime import datetime
+from operator import attrgetter
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Any, Optional
 from ib_insync import *
 
+# Column layout of get_portfolio_positions_enhanced; each attribute tuple is
+# read in one attrgetter call (primaryExchange only backs up a blank Exchange)
+POSITION_COLUMNS = (
+    'Symbol', 'SecType', 'Exchange', 'Primary Exchange', 'Currency', 'Position',
+    'Market Price', 'Market Value', 'Average Cost', 'Unrealized PnL', 'Realized PnL', 'Account'
+)
+_get_position = attrgetter(
+    'contract.symbol', 'contract.secType', 'contract.exchange', 'contract.primaryExchange',
+    'contract.currency', 'position', 'marketPrice', 'marketValue', 'averageCost',
+    'unrealizedPNL', 'realizedPNL', 'account'
+)
+POSITION_NUMERIC = ('Position', 'Market Price', 'Market Value', 'Average Cost',
+                    'Unrealized PnL', 'Realized PnL')
+POSITION_CATEGORIES = ('Symbol', 'SecType', 'Exchange', 'Currency', 'Account')
+
+ORDER_COLUMNS = (
+    'Order ID', 'Symbol', 'Action', 'Order Type', 'Total Quantity', 'Limit Price',
+    'Status', 'Filled', 'Remaining', 'Account'
+)
+ORDER_CATEGORIES = ('Symbol', 'Action', 'Order Type', 'Status', 'Account')
+_get_order = attrgetter(
+    'orderId', 'contract.symbol', 'action', 'orderType', 'totalQuantity', 'lmtPrice',
+    'orderState.status', 'filled', 'remaining', 'account'
+)
+
+# Account summary tags that stop the fallback chain once all are present
+REQUIRED_SUMMARY_TAGS = {'NetLiquidation', 'TotalCashValue', 'BuyingPower'}
+
+def _num(value):
+    """Parse an IB account value string once; non-numeric values pass through"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+def _summary_entry(item) -> Dict[str, Any]:
+    """Summary dict entry for an AccountValue, with the number parsed up front"""
+    return {
+        'value': item.value,
+        'num': _num(item.value),
+        'currency': item.currency,
+        'account': item.account
+    }
+
 class EnhancedDataHandler:
     """Enhanced data handler with better IBKR data processing"""
     
     def __init__(self, ib_connection):
         self.ib = ib_connection
-        self.logger = None
+        self.logger = logging.getLogger(__name__ + ".EnhancedDataHandler")
+        
+        # Live account summary kept current by IB's pushed updates
+        self._summary: Dict[str, Dict[str, Any]] = {}
+        self._summary_requested = False
+        for item in self.ib.wrapper.acctSummary.values():
+            self._on_summary(item)
+        self.ib.accountSummaryEvent += self._on_summary
     
-    def get_account_summary_enhanced(self) -> Dict[str, Any]:
+    def _on_summary(self, item):
+        """Record one pushed account summary value"""
+        self._summary[item.tag] = _summary_entry(item)
+    
+    async def get_account_summary_enhanced(self) -> Dict[str, Any]:
         """Get enhanced account summary with better error handling"""
         try:
             print("🔍 Getting account summary...")
             
+            # Read each IB list once for the fallback methods below
+            accounts = self.ib.managedAccounts()
+            account_values = self.ib.accountValues()
+            
             # Get account summary using different methods
             summary_dict = {}
             
-            # Method 1: Try accountSummary()
+            # Method 1: Live account summary (subscribed once, then updated by events)
             try:
-                account_summary = self.ib.accountSummary()
-                print(f"📊 Account summary retrieved: {len(account_summary)} items")
+                if not self._summary_requested:
+                    await self.ib.reqAccountSummaryAsync()
+                    self._summary_requested = True
                 
-                for item in account_summary:
-                    summary_dict[item.tag] = {
-                        'value': item.value,
-                        'currency': item.currency,
-                        'account': item.account
-                    }
-                    print(f"  {item.tag}: {item.value} {item.currency}")
+                summary_dict.update(self._summary)
+                print(f"📊 Account summary retrieved: {len(summary_dict)} items")
                     
             except Exception as e:
                 print(f"⚠️ Method 1 (accountSummary) failed: {e}")
             
-            # Method 2: Try accountValues() if accountSummary failed
-            if not summary_dict:
+            # Method 2: Try accountValues() if accountSummary missed required tags
+            if REQUIRED_SUMMARY_TAGS - summary_dict.keys():
                 try:
                     print("🔄 Trying alternative method (accountValues)...")
-                    account_values = self.ib.accountValues()
+                    from_summary = set(summary_dict)  # Keep what Method 1 already found
                     print(f"📊 Account values retrieved: {len(account_values)} items")
                     
                     for item in account_values:
-                        summary_dict[item.tag] = {
-                            'value': item.value,
-                            'currency': item.currency,
-                            'account': item.account
-                        }
-                        print(f"  {item.tag}: {item.value} {item.currency}")
+                        if item.tag in from_summary:
+                            continue
+                        summary_dict[item.tag] = _summary_entry(item)
+                        self.logger.debug("%s: %s %s", item.tag, item.value, item.currency)
                         
                 except Exception as e:
                     print(f"⚠️ Method 2 (accountValues) failed: {e}")
             
-            # Method 3: Try specific account value requests
-            if not summary_dict:
+            # Method 3: Try specific account value requests if tags are still missing
+            if REQUIRED_SUMMARY_TAGS - summary_dict.keys():
                 try:
                     print("🔄 Trying specific account requests...")
                     
-                    # Get managed accounts first
-                    accounts = self.ib.managedAccounts()
                     print(f"📋 Managed accounts: {accounts}")
                     
                     if accounts:
@@ -76,19 +130,18 @@ class EnhancedDataHandler:
                             'GrossPositionValue', 'UnrealizedPnL', 'RealizedPnL'
                         ]
                         
-                        for tag in specific_tags:
-                            try:
-                                values = [v for v in self.ib.accountValues() if v.tag == tag and v.account == account]
-                                if values:
-                                    val = values[0]
-                                    summary_dict[tag] = {
-                                        'value': val.value,
-                                        'currency': val.currency,
-                                        'account': val.account
-                                    }
-                                    print(f"  {tag}: {val.value} {val.currency}")
-                            except Exception as tag_error:
-                                print(f"    ⚠️ Failed to get {tag}: {tag_error}")
+                        # One batched summary request covers every tag; PnL tags
+                        # only appear in accountValues, so scan both lists once
+                        if not self._summary_requested:
+                            await self.ib.reqAccountSummaryAsync()
+                            self._summary_requested = True
+                        wanted = set(specific_tags)
+                        candidates = list(self.ib.wrapper.acctSummary.values()) + account_values
+                        
+                        for val in candidates:
+                            if val.tag in wanted and val.account == account and val.tag not in summary_dict:
+                                summary_dict[val.tag] = _summary_entry(val)
+                                self.logger.debug("%s: %s %s", val.tag, val.value, val.currency)
                                 
                 except Exception as e:
                     print(f"⚠️ Method 3 (specific requests) failed: {e}")
@@ -96,12 +149,13 @@ class EnhancedDataHandler:
             # Add some computed values if we have basic data
             if 'NetLiquidation' in summary_dict and 'TotalCashValue' in summary_dict:
                 try:
-                    net_liq = float(summary_dict['NetLiquidation']['value'])
-                    cash = float(summary_dict['TotalCashValue']['value'])
+                    net_liq = summary_dict['NetLiquidation']['num']
+                    cash = summary_dict['TotalCashValue']['num']
                     invested = net_liq - cash
                     
                     summary_dict['InvestedAmount'] = {
                         'value': str(invested),
+                        'num': invested,
                         'currency': summary_dict['NetLiquidation']['currency'],
                         'account': summary_dict['NetLiquidation']['account']
                     }
@@ -121,70 +175,54 @@ class EnhancedDataHandler:
         try:
             print("🔍 Getting portfolio positions...")
             
-            positions = self.ib.positions()
+            # Portfolio items carry prices and P&L; plain positions() only has
+            # quantity and average cost
+            positions = self.ib.portfolio()
             print(f"📈 Found {len(positions)} positions")
             
             if not positions:
                 print("ℹ️ No positions found")
                 return pd.DataFrame()
             
-            portfolio_data = []
-            
+            rows = []
             for i, pos in enumerate(positions):
                 try:
-                    contract = pos.contract
-                    print(f"  Processing position {i+1}: {contract.symbol}")
-                    
-                    # Get additional contract details
-                    symbol = contract.symbol
-                    sec_type = contract.secType
-                    exchange = contract.exchange or contract.primaryExchange or 'SMART'
-                    currency = contract.currency
-                    
-                    # Position details
-                    position_size = pos.position
-                    market_price = pos.marketPrice if pos.marketPrice else 0.0
-                    market_value = pos.marketValue if pos.marketValue else 0.0
-                    average_cost = pos.averageCost if pos.averageCost else 0.0
-                    unrealized_pnl = pos.unrealizedPNL if pos.unrealizedPNL else 0.0
-                    realized_pnl = pos.realizedPNL if pos.realizedPNL else 0.0
-                    
-                    print(f"    {symbol}: {position_size} shares @ ${market_price:.2f}")
-                    
-                    portfolio_data.append({
-                        'Symbol': symbol,
-                        'SecType': sec_type,
-                        'Exchange': exchange,
-                        'Currency': currency,
-                        'Position': position_size,
-                        'Market Price': market_price,
-                        'Market Value': market_value,
-                        'Average Cost': average_cost,
-                        'Unrealized PnL': unrealized_pnl,
-                        'Realized PnL': realized_pnl,
-                        'Account': pos.account
-                    })
-                    
+                    row = _get_position(pos)
+                    self.logger.debug("Processing position %d: %s", i + 1, row[0])
+                    rows.append(row)
                 except Exception as pos_error:
-                    print(f"    ⚠️ Error processing position {i+1}: {pos_error}")
+                    self.logger.warning("Error processing position %d: %s", i + 1, pos_error)
                     continue
             
-            df = pd.DataFrame(portfolio_data)
+            df = pd.DataFrame.from_records(rows, columns=POSITION_COLUMNS)
+            
+            # Fill blanks column-wise: exchange falls back to primary exchange, then SMART;
+            # missing numbers become 0.0
+            df['Exchange'] = (df['Exchange'].replace('', np.nan)
+                              .fillna(df['Primary Exchange'].replace('', np.nan))
+                              .fillna('SMART'))
+            df = df.drop(columns='Primary Exchange')
+            for column in POSITION_NUMERIC:
+                df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0.0).astype('float64')
+            
+            # Repeated labels are stored as category codes
+            df = df.astype({column: 'category' for column in POSITION_CATEGORIES})
             print(f"✅ Portfolio DataFrame created with {len(df)} positions")
             
             # Add computed columns
             if not df.empty:
                 try:
                     # Calculate percentage change
-                    df['Pct Change'] = df.apply(
-                        lambda row: ((row['Market Price'] - row['Average Cost']) / row['Average Cost'] * 100) 
-                        if row['Average Cost'] > 0 else 0, axis=1
-                    )
+                    avg_cost = df['Average Cost'].to_numpy(dtype=np.float64)
+                    price = df['Market Price'].to_numpy(dtype=np.float64)
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        df['Pct Change'] = np.where(avg_cost > 0, (price - avg_cost) / avg_cost * 100.0, 0.0)
                     
                     # Calculate position weight (approximate)
-                    total_abs_value = df['Market Value'].abs().sum()
+                    abs_value = np.abs(df['Market Value'].to_numpy(dtype=np.float64))
+                    total_abs_value = abs_value.sum()
                     if total_abs_value > 0:
-                        df['Weight %'] = (df['Market Value'].abs() / total_abs_value * 100).round(2)
+                        df['Weight %'] = np.round(abs_value * (100.0 / total_abs_value), 2)
                     else:
                         df['Weight %'] = 0
                         
@@ -193,12 +231,17 @@ class EnhancedDataHandler:
                 except Exception as e:
                     print(f"⚠️ Error adding computed columns: {e}")
             
-            return df
+            # Indexed by symbol for lookups; filter with df.query (see filter_active)
+            return df.set_index('Symbol').sort_index()
             
         except Exception as e:
             print(f"❌ Error in get_portfolio_positions_enhanced: {e}")
             return pd.DataFrame()
     
+    def filter_active(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Positions with a non-zero size, e.g. df.query('Position != 0 & `Market Value` > 0')"""
+        return df.query('Position != 0')
+    
     def get_open_orders_enhanced(self) -> pd.DataFrame:
         """Get enhanced open orders information"""
         try:
@@ -210,27 +253,20 @@ class EnhancedDataHandler:
             if not orders:
                 return pd.DataFrame()
             
-            orders_data = []
-            for order in orders:
-                try:
-                    contract = order.contract
-                    orders_data.append({
-                        'Order ID': order.orderId,
-                        'Symbol': contract.symbol,
-                        'Action': order.action,
-                        'Order Type': order.orderType,
-                        'Total Quantity': order.totalQuantity,
-                        'Limit Price': getattr(order, 'lmtPrice', None),
-                        'Status': order.orderState.status,
-                        'Filled': order.filled,
-                        'Remaining': order.remaining,
-                        'Account': order.account
-                    })
-                except Exception as order_error:
-                    print(f"⚠️ Error processing order: {order_error}")
-                    continue
+            try:
+                rows = [_get_order(order) for order in orders]
+            except AttributeError:
+                # Some order lacks a field; fall back to row-by-row and skip the bad ones
+                rows = []
+                for order in orders:
+                    try:
+                        rows.append(_get_order(order))
+                    except Exception as order_error:
+                        self.logger.warning("Error processing order: %s", order_error)
             
-            df = pd.DataFrame(orders_data)
+            df = pd.DataFrame.from_records(rows, columns=ORDER_COLUMNS) if rows else pd.DataFrame()
+            if not df.empty:
+                df = df.astype({column: 'category' for column in ORDER_CATEGORIES})
             print(f"✅ Orders DataFrame created with {len(df)} orders")
             return df
             
@@ -267,7 +303,7 @@ async def diagnose_data_issues():
             # Test account summary
             print("\n📊 Testing Account Summary...")
             print("-" * 30)
-            summary = handler.get_account_summary_enhanced()
+            summary = await handler.get_account_summary_enhanced()
             
             if summary:
                 print(f"✅ Got {len(summary)} summary items:")
@@ -5,10 +5,11 @@ Checks all components and helps fix connection issues
 """
 
 import sys
-import importlib
+import importlib.util
 import subprocess
 import asyncio
 from datetime import datetime
+from pathlib import Path
 
 def check_dependencies():
     """Check if all required packages are installed"""
@@ -26,10 +27,10 @@ def check_dependencies():
     missing_packages = []
     
     for package, description in required_packages:
-        try:
-            importlib.import_module(package)
+        # find_spec locates the package without running its import-time code
+        if importlib.util.find_spec(package) is not None:
             print(f"✅ {package} - {description}")
-        except ImportError:
+        else:
             print(f"❌ {package} - {description} (MISSING)")
             missing_packages.append(package)
     
@@ -41,56 +42,77 @@ def check_dependencies():
     print("✅ All dependencies are installed!")
     return True
 
-async def test_ibkr_connection():
-    """Test IBKR connection with all common ports"""
-    print("\n🔌 Testing IBKR Connection...")
-    print("-" * 30)
+IBKR_PORTS = [
+    (7497, "TWS Paper Trading"),
+    (7496, "TWS Live Trading"), 
+    (4001, "Gateway Paper Trading"),
+    (4000, "Gateway Live Trading")
+]
+
+async def probe_ibkr_ports(host: str = '127.0.0.1'):
+    """Probe every common IBKR port concurrently; returns (connected, report lines) per port"""
+    from ib_insync import IB
     
-    try:
-        from ib_insync import IB
-        
-        ports_to_test = [
-            (7497, "TWS Paper Trading"),
-            (7496, "TWS Live Trading"), 
-            (4001, "Gateway Paper Trading"),
-            (4000, "Gateway Live Trading")
-        ]
-        
-        host = '127.0.0.1'
-        working_connections = []
+    async def probe(port):
+        """
+        Try one port
         
-        for port, description in ports_to_test:
-            ib = IB()
+        Each probe owns its IB(): one instance holds a single socket, so it
+        cannot be shared by probes running at the same time.
+        """
+        ib = IB()
+        lines = []
+        connected = False
+        try:
+            # Probes run concurrently, so each needs its own client ID
+            await ib.connectAsync(host, port, clientId=999 + port, timeout=3)
+            lines.append("✅ SUCCESS")
+            connected = True
+            
+            # Test basic operations
             try:
-                print(f"Testing {description} (port {port})...", end=" ")
-                await ib.connectAsync(host, port, clientId=999, timeout=3)
-                print("✅ SUCCESS")
-                
-                # Test basic operations
-                try:
-                    accounts = ib.managedAccounts()
-                    print(f"  📋 Accounts: {accounts}")
-                    
-                    summary = ib.accountSummary()
-                    print(f"  📊 Account summary: {len(summary)} items")
-                    
-                except Exception as e:
-                    print(f"  ⚠️  Connected but limited data access: {e}")
+                accounts = ib.managedAccounts()
+                lines.append(f"  📋 Accounts: {accounts}")
                 
-                working_connections.append((port, description))
-                ib.disconnect()
+                summary = await ib.accountSummaryAsync()
+                lines.append(f"  📊 Account summary: {len(summary)} items")
                 
-            except asyncio.TimeoutError:
-                print("❌ Timeout")
-            except ConnectionRefusedError:
-                print("❌ Connection refused")
             except Exception as e:
-                print(f"❌ Error: {e}")
+                lines.append(f"  ⚠️  Connected but limited data access: {e}")
             
-            try:
+        except asyncio.TimeoutError:
+            lines.append("❌ Timeout")
+        except ConnectionRefusedError:
+            lines.append("❌ Connection refused")
+        except Exception as e:
+            lines.append(f"❌ Error: {e}")
+        finally:
+            if ib.isConnected():
                 ib.disconnect()
-            except:
-                pass
+        return connected, lines
+    
+    return await asyncio.gather(*(probe(port) for port, _ in IBKR_PORTS))
+
+async def test_ibkr_connection(probes=None):
+    """
+    Test IBKR connection with all common ports
+    
+    Args:
+        probes: Already-started probe_ibkr_ports() task to report on (optional)
+    """
+    print("\n🔌 Testing IBKR Connection...")
+    print("-" * 30)
+    
+    try:
+        results = await (probes if probes is not None else probe_ibkr_ports())
+        
+        working_connections = []
+        for (port, description), (connected, lines) in zip(IBKR_PORTS, results):
+            print(f"Testing {description} (port {port})... {lines[0]}")
+            for line in lines[1:]:
+                print(line)
+            if connected:
+                working_connections.append((port, description))
         
         if working_connections:
             print(f"\n✅ Found {len(working_connections)} working connection(s):")
@@ -155,7 +177,7 @@ def test_dashboard_components():
             print("✅ Dashboard app can be imported")
             
             # Test if routes are registered
-            routes = [rule.rule for rule in app.url_map.iter_rules()]
+            routes = {rule.rule for rule in app.url_map.iter_rules()}
             expected_routes = ['/', '/api/connect', '/api/disconnect', '/api/portfolio']
             
             for route in expected_routes:
@@ -174,14 +196,10 @@ def test_dashboard_components():
         print(f"❌ Missing web framework components: {e}")
         return False
 
-def create_test_config(recommended_port=None):
-    """Create a test configuration"""
-    if not recommended_port:
-        recommended_port = 7497  # Default to paper trading
-    
-    config_content = f'''"""
+# config.py written by create_test_config; only {recommended_port} and {now} are filled in
+_CFG_TEMPLATE = '''"""
 Test Configuration for IBKR Portfolio Manager
-Generated by diagnostic script at {datetime.now()}
+Generated by diagnostic script at {now}
 """
 
 import os
@@ -241,10 +259,15 @@ import os
 os.makedirs('snapshots', exist_ok=True)
 os.makedirs('logs', exist_ok=True)
 '''
+
+def create_test_config(recommended_port=None):
+    """Create a test configuration"""
+    if not recommended_port:
+        recommended_port = 7497  # Default to paper trading
     
     try:
-        with open('config.py', 'w') as f:
-            f.write(config_content)
+        Path('config.py').write_text(_CFG_TEMPLATE.format(recommended_port=recommended_port,
+                                                          now=datetime.now()))
         print(f"✅ Created config.py with port {recommended_port}")
         return True
     except Exception as e:
@@ -266,14 +289,17 @@ async def main():
         print("\n❌ Please install missing dependencies first!")
         return
     
-    # Step 2: Test IBKR connection
-    recommended_port = await test_ibkr_connection()
+    # Step 2: Start probing IBKR ports in the background; the probes mostly wait on sockets
+    probes = asyncio.create_task(probe_ibkr_ports())
+    await asyncio.sleep(0)  # Let the probes start connecting
     
-    # Step 3: Check current config
-    current_config = check_config()
+    # Steps 3-4: Check current config and dashboard components on a worker thread
+    # (they import modules and would otherwise block the probes' event loop)
+    current_config = await asyncio.to_thread(check_config)
+    dashboard_ok = await asyncio.to_thread(test_dashboard_components)
     
-    # Step 4: Test dashboard components
-    dashboard_ok = test_dashboard_components()
+    # Report the IBKR connection results once the probes finish
+    recommended_port = await test_ibkr_connection(probes)
     
     # Step 5: Create/update config if needed
     if recommended_port and (not current_config or current_config.get('port') != recommended_port):
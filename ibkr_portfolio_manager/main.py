@@ -3,23 +3,49 @@ IBKR Portfolio Manager
 A Python application to monitor Interactive Brokers portfolio using TWS API
 """
 
+from __future__ import annotations
 
 import asyncio
+import importlib.util
 import logging
 from datetime import datetime, timedelta
-import pandas as pd
-from typing import Dict, List, Optional
-import json
+import numpy as np
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
 import time
 
+import orjson
+
+# pandas is imported by the methods that build frames, so one-shot commands
+# such as an account summary don't pay for it at startup
+if TYPE_CHECKING:
+    import pandas as pd
+
 try:
     from ib_insync import *
     import nest_asyncio
+    # Applied at import rather than on demand: the synchronous ib_insync calls
+    # re-enter whichever loop is running later, so it must be patched up front
     nest_asyncio.apply()
 except ImportError:
     print("Please install required packages: pip install ib-insync pandas")
     exit(1)
 
+# Parquet snapshots need pyarrow (imported when writing); JSON snapshots work without it
+PYARROW_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Repeated labels are stored as categoricals; money columns stay float64 so
+# totals keep cent precision
+POSITION_CATEGORIES = ('Symbol', 'SecType', 'Exchange', 'Currency', 'Account')
+ORDER_CATEGORIES = ('Symbol', 'Action', 'Order Type', 'Status', 'Account')
+POSITION_DTYPE = np.dtype([
+    ('Symbol', 'U32'), ('SecType', 'U8'), ('Exchange', 'U16'), ('Currency', 'U8'),
+    ('Position', 'f8'), ('Market Price', 'f8'), ('Market Value', 'f8'), ('Average Cost', 'f8'),
+    ('Unrealized PnL', 'f8'), ('Realized PnL', 'f8'), ('Account', 'U16')
+])
+
+# Indented like the old json.dump output; NumPy scalars and dataclasses encode natively
+SNAPSHOT_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
 class IBKRPortfolioManager:
     def __init__(self, host: str = '127.0.0.1', port: int = 7497, client_id: int = 1):
         """
@@ -36,6 +62,16 @@ class IBKRPortfolioManager:
         self.client_id = client_id
         self.connected = False
         
+        # Short-lived results so one monitor tick and its snapshot share a fetch
+        self.refresh_ttl = 1.0
+        self._cache: Dict[str, Tuple[float, Any]] = {}
+        self._renders: Dict[str, Tuple[int, str]] = {}  # Last monitor table text per frame
+        
+        # While subscribed, cached getter results stay valid until an IBKR event
+        # for that data arrives instead of expiring after refresh_ttl
+        self.subscribed = False
+        self._subscriptions: List[Tuple[Any, Callable]] = []
+        
         # Setup logging
         logging.basicConfig(
             level=logging.INFO,
@@ -53,20 +89,122 @@ class IBKRPortfolioManager:
             await self.ib.connectAsync(self.host, self.port, clientId=self.client_id, timeout=10)
             self.connected = True
             self.logger.info(f"Connected to IBKR TWS/Gateway at {self.host}:{self.port}")
+            await self._subscribe()
             return True
         except Exception as e:
             self.logger.error(f"Failed to connect to IBKR: {e}")
             return False
     
+    async def _subscribe(self):
+        """Start push updates so the getters serve event-maintained state"""
+        try:
+            # Portfolio items and open orders are already streamed since connectAsync
+            accounts = self.ib.managedAccounts()
+            if accounts:
+                self.ib.reqPnL(accounts[0])
+            await self.ib.reqAccountSummaryAsync()
+            
+            for event, key in ((self.ib.accountSummaryEvent, 'account_summary'),
+                               (self.ib.updatePortfolioEvent, 'positions'),
+                               (self.ib.pnlEvent, 'pnl_summary'),
+                               (self.ib.openOrderEvent, 'open_orders'),
+                               (self.ib.orderStatusEvent, 'open_orders')):
+                handler = self._invalidator(key)
+                event.connect(handler)
+                self._subscriptions.append((event, handler))
+            self.subscribed = True
+        except Exception as e:
+            self.logger.warning(f"Push updates unavailable, polling instead: {e}")
+    
+    def _invalidator(self, key: str) -> Callable:
+        """Event handler that drops the cached result for key"""
+        def handler(*args):
+            self._cache.pop(key, None)
+        return handler
+    
     def disconnect(self):
         """Disconnect from TWS/Gateway"""
         if self.connected:
+            for event, handler in self._subscriptions:
+                event.disconnect(handler)
+            self._subscriptions.clear()
+            self.subscribed = False
+            
             self.ib.disconnect()
             self.connected = False
+            self._cache.clear()
             self.logger.info("Disconnected from IBKR")
     
+    def _cached(self, key: str, ttl: float, fn: Callable[[], Any]) -> Any:
+        """Return fn()'s result, reusing it for ttl seconds (or until invalidated while subscribed)"""
+        now = time.monotonic()
+        hit = self._cache.get(key)
+        if hit is not None and (self.subscribed or now - hit[0] < ttl):
+            return hit[1]
+        
+        return self._store(key, fn())
+    
+    def _store(self, key: str, value: Any) -> Any:
+        """Cache a freshly fetched value under key"""
+        self._cache[key] = (time.monotonic(), value)
+        return value
+    
     def get_account_summary(self) -> Dict:
         """Get account summary information"""
+        return self._cached('account_summary', self.refresh_ttl, self._raw_account_summary)
+    
+    def get_portfolio_positions(self) -> pd.DataFrame:
+        """Get current portfolio positions"""
+        return self._cached('positions', self.refresh_ttl, self._raw_portfolio_positions)
+    
+    def get_pnl_summary(self) -> Dict:
+        """Get P&L summary"""
+        return self._cached('pnl_summary', self.refresh_ttl, self._raw_pnl_summary)
+    
+    def get_open_orders(self) -> pd.DataFrame:
+        """Get open orders"""
+        return self._cached('open_orders', self.refresh_ttl, self._raw_open_orders)
+    
+    def _render(self, key: str, df: pd.DataFrame) -> str:
+        """Format df for the monitor, reusing the last text while its contents are unchanged"""
+        import pandas as pd
+        
+        digest = hash((tuple(df.columns),
+                       pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()))
+        cached = self._renders.get(key)
+        if cached is not None and cached[0] == digest:
+            return cached[1]
+        
+        text = df.to_string(index=False, max_rows=50, float_format='{:.2f}'.format)
+        self._renders[key] = (digest, text)
+        return text
+    
+    async def _a_summary(self) -> Dict:
+        """Refresh the account summary without blocking the event loop"""
+        try:
+            await self.ib.accountSummaryAsync()
+        except Exception as e:
+            self.logger.error(f"Error requesting account summary: {e}")
+        return self._store('account_summary', self._raw_account_summary())
+    
+    async def _a_positions(self) -> pd.DataFrame:
+        """Refresh portfolio positions without blocking the event loop"""
+        try:
+            await self.ib.reqPositionsAsync()
+        except Exception as e:
+            self.logger.error(f"Error requesting positions: {e}")
+        return self._store('positions', self._raw_portfolio_positions())
+    
+    async def _a_orders(self) -> pd.DataFrame:
+        """Refresh open orders without blocking the event loop"""
+        try:
+            await self.ib.reqOpenOrdersAsync()
+        except Exception as e:
+            self.logger.error(f"Error requesting open orders: {e}")
+        return self._store('open_orders', self._raw_open_orders())
+    
+    def _raw_account_summary(self) -> Dict:
+        """Fetch account summary information from IBKR"""
         if not self.connected:
             self.logger.error("Not connected to IBKR")
             return {}
@@ -88,64 +226,61 @@ class IBKRPortfolioManager:
             self.logger.error(f"Error getting account summary: {e}")
             return {}
     
-    def get_portfolio_positions(self) -> pd.DataFrame:
-        """Get current portfolio positions"""
+    def _raw_portfolio_positions(self) -> pd.DataFrame:
+        """Fetch current portfolio positions from IBKR"""
+        import pandas as pd
+        
         if not self.connected:
             self.logger.error("Not connected to IBKR")
             return pd.DataFrame()
         
         try:
-            positions = self.ib.positions()
+            # Portfolio items (streamed since connect) carry prices and P&L; plain
+            # positions() only has quantity and average cost
+            positions = self.ib.portfolio()
             if not positions:
                 self.logger.info("No positions found")
                 return pd.DataFrame()
             
-            portfolio_data = []
-            for pos in positions:
-                contract = pos.contract
-                portfolio_data.append({
-                    'Symbol': contract.symbol,
-                    'SecType': contract.secType,
-                    'Exchange': contract.exchange,
-                    'Currency': contract.currency,
-                    'Position': pos.position,
-                    'Market Price': pos.marketPrice,
-                    'Market Value': pos.marketValue,
-                    'Average Cost': pos.averageCost,
-                    'Unrealized PnL': pos.unrealizedPNL,
-                    'Realized PnL': pos.realizedPNL,
-                    'Account': pos.account
-                })
-            
-            df = pd.DataFrame(portfolio_data)
-            return df
+            # Fill one preallocated record array and hand it to pandas
+            records = np.fromiter(
+                ((pos.contract.symbol, pos.contract.secType, pos.contract.exchange,
+                  pos.contract.currency, pos.position, pos.marketPrice, pos.marketValue,
+                  pos.averageCost, pos.unrealizedPNL, pos.realizedPNL, pos.account)
+                 for pos in positions),
+                dtype=POSITION_DTYPE, count=len(positions)
+            )
+            df = pd.DataFrame.from_records(records)
+            return df.astype({column: 'category' for column in POSITION_CATEGORIES})
         except Exception as e:
             self.logger.error(f"Error getting portfolio positions: {e}")
             return pd.DataFrame()
     
-    def get_pnl_summary(self) -> Dict:
-        """Get P&L summary"""
+    def _raw_pnl_summary(self) -> Dict:
+        """Fetch P&L summary from IBKR"""
         if not self.connected:
             self.logger.error("Not connected to IBKR")
             return {}
         
         try:
-            pnl_summary = self.ib.pnl()
-            if pnl_summary:
+            # Account-level PnL from the reqPnL subscription
+            pnl_list = self.ib.pnl()
+            if pnl_list:
+                pnl_summary = pnl_list[0]
                 return {
                     'Daily PnL': pnl_summary.dailyPnL,
                     'Unrealized PnL': pnl_summary.unrealizedPnL,
-                    'Realized PnL': pnl_summary.realizedPnL,
-                    'Position': pnl_summary.position,
-                    'Market Value': pnl_summary.marketValue
+                    'Realized PnL': pnl_summary.realizedPnL
                 }
             return {}
         except Exception as e:
             self.logger.error(f"Error getting PnL summary: {e}")
             return {}
     
-    def get_open_orders(self) -> pd.DataFrame:
-        """Get open orders"""
+    def _raw_open_orders(self) -> pd.DataFrame:
+        """Fetch open orders from IBKR"""
+        import pandas as pd
+        
         if not self.connected:
             self.logger.error("Not connected to IBKR")
             return pd.DataFrame()
@@ -173,12 +308,12 @@ class IBKRPortfolioManager:
                 })
             
             df = pd.DataFrame(orders_data)
-            return df
+            return df.astype({column: 'category' for column in ORDER_CATEGORIES})
         except Exception as e:
             self.logger.error(f"Error getting open orders: {e}")
             return pd.DataFrame()
     
-    def monitor_portfolio(self, refresh_interval: int = 30):
+    async def monitor_portfolio(self, refresh_interval: int = 30):
         """Monitor portfolio with periodic updates"""
         self.logger.info(f"Starting portfolio monitoring (refresh every {refresh_interval}s)")
         
@@ -188,9 +323,19 @@ class IBKRPortfolioManager:
                 print(f"Portfolio Update - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 print("="*80)
                 
+                if self.subscribed:
+                    # Served from state kept current by IBKR events
+                    account_summary = self.get_account_summary()
+                    positions_df = self.get_portfolio_positions()
+                    orders_df = self.get_open_orders()
+                else:
+                    # The three requests are in flight together
+                    account_summary, positions_df, orders_df = await asyncio.gather(
+                        self._a_summary(), self._a_positions(), self._a_orders()
+                    )
+                
                 # Account Summary
                 print("\n📊 ACCOUNT SUMMARY:")
-                account_summary = self.get_account_summary()
                 key_metrics = ['NetLiquidation', 'TotalCashValue', 'UnrealizedPnL', 'RealizedPnL', 'DayTradesRemaining']
                 for metric in key_metrics:
                     if metric in account_summary:
@@ -198,13 +343,13 @@ class IBKRPortfolioManager:
                 
                 # Portfolio Positions
                 print("\n📈 PORTFOLIO POSITIONS:")
-                positions_df = self.get_portfolio_positions()
                 if not positions_df.empty:
-                    print(positions_df.to_string(index=False))
+                    print(self._render('positions', positions_df))
                     
-                    # Summary stats
-                    total_value = positions_df['Market Value'].sum()
-                    total_unrealized_pnl = positions_df['Unrealized PnL'].sum()
+                    # Summary stats, both totals reduced from one float block
+                    total_value, total_unrealized_pnl = positions_df[
+                        ['Market Value', 'Unrealized PnL']
+                    ].to_numpy(dtype=float).sum(axis=0).tolist()
                     print(f"\n  Total Portfolio Value: {total_value:,.2f}")
                     print(f"  Total Unrealized P&L: {total_unrealized_pnl:,.2f}")
                 else:
@@ -212,43 +357,91 @@ class IBKRPortfolioManager:
                 
                 # Open Orders
                 print("\n📋 OPEN ORDERS:")
-                orders_df = self.get_open_orders()
                 if not orders_df.empty:
-                    print(orders_df.to_string(index=False))
+                    print(self._render('open_orders', orders_df))
                 else:
                     print("  No open orders")
                 
-                # Wait for next update
-                time.sleep(refresh_interval)
+                # Wait for next update; ib_insync keeps servicing the socket meanwhile
+                await asyncio.sleep(refresh_interval)
                 
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, asyncio.CancelledError):
             self.logger.info("Portfolio monitoring stopped by user")
         except Exception as e:
             self.logger.error(f"Error in portfolio monitoring: {e}")
     
     def save_portfolio_snapshot(self, filename: Optional[str] = None):
-        """Save current portfolio snapshot to file"""
+        """
+        Save current portfolio snapshot to file
+        
+        Snapshots are JSON unless the filename asks for another format: a
+        .parquet filename writes the positions table with Zstd compression and
+        stores the account summary, open orders and P&L in the file metadata;
+        .npz writes compressed NumPy arrays with a JSON header.
+        """
+        now = datetime.now()
         if not filename:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            timestamp = now.strftime('%Y%m%d_%H%M%S')
             filename = f'portfolio_snapshot_{timestamp}.json'
         
         try:
             data = {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': now.isoformat(),
                 'account_summary': self.get_account_summary(),
-                'positions': self.get_portfolio_positions().to_dict('records'),
+                'positions': self.get_portfolio_positions(),
                 'open_orders': self.get_open_orders().to_dict('records'),
                 'pnl_summary': self.get_pnl_summary()
             }
             
-            with open(filename, 'w') as f:
-                json.dump(data, f, indent=2, default=str)
+            if filename.lower().endswith('.parquet'):
+                self._write_parquet_snapshot(filename, data)
+            elif filename.lower().endswith('.npz'):
+                self._write_npz_snapshot(filename, data)
+            else:
+                data['positions'] = data['positions'].to_dict('records')
+                with open(filename, 'wb') as f:
+                    f.write(orjson.dumps(data, default=str, option=SNAPSHOT_JSON_OPTIONS))
             
             self.logger.info(f"Portfolio snapshot saved to {filename}")
             return filename
         except Exception as e:
             self.logger.error(f"Error saving portfolio snapshot: {e}")
             return None
+    
+    def _write_parquet_snapshot(self, filename: str, data: Dict):
+        """Write positions as a Zstd-compressed Parquet table"""
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Parquet snapshots: pip install pyarrow")
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        table = pa.Table.from_pandas(data['positions'], preserve_index=False)
+        snapshot_meta = {
+            key: orjson.dumps(value, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+            for key, value in data.items() if key != 'positions'
+        }
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), **snapshot_meta})
+        pq.write_table(table, filename, compression='zstd', compression_level=6)
+    
+    def _write_npz_snapshot(self, filename: str, data: Dict):
+        """Write positions as compressed NumPy arrays plus a JSON header"""
+        positions = data['positions']
+        numeric = positions.select_dtypes('number')
+        labels = positions.select_dtypes(exclude='number')
+        
+        header = {key: value for key, value in data.items() if key != 'positions'}
+        header['numeric_columns'] = numeric.columns.tolist()
+        header['label_columns'] = labels.columns.tolist()
+        
+        # Fixed-width string and uint8 arrays load back without pickle
+        np.savez_compressed(
+            filename,
+            positions_num=numeric.to_numpy(dtype=np.float64),
+            positions_cat=labels.astype(str).to_numpy(dtype=str),
+            header=np.frombuffer(
+                orjson.dumps(header, default=str, option=orjson.OPT_SERIALIZE_NUMPY), dtype=np.uint8
+            )
+        )
 
 # Example usage and main function
 async def main():
@@ -292,7 +485,7 @@ async def main():
             # Option to start monitoring
             response = input("\nStart continuous monitoring? (y/n): ").lower()
             if response == 'y':
-                portfolio_manager.monitor_portfolio(refresh_interval=30)
+                await portfolio_manager.monitor_portfolio(refresh_interval=30)
             
         finally:
             portfolio_manager.disconnect()
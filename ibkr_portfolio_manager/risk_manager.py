@@ -5,16 +5,85 @@ Includes position sizing, stop losses, volatility analysis, and risk alerts
 
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from datetime import date, datetime, timedelta
 import logging
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from enum import Enum
 import asyncio
+import functools
+import sqlite3
+from pathlib import Path
 
 from main import IBKRPortfolioManager
+from config import get_config
+from jit import njit, prange, NUMBA_AVAILABLE
 from ib_insync import *
 
+# Daily bars are cached as Parquet when pyarrow is installed
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+# Historical data requests allowed in flight at once (IBKR caps this at 50)
+HISTORICAL_CONCURRENCY = 45
+
+@functools.lru_cache(maxsize=2048)
+def _stock(symbol: str, exchange: str, currency: str) -> Stock:
+    """Shared Stock contract per key, so qualification sticks across analyses"""
+    return Stock(symbol, exchange, currency)
+
+def _percentile5(block: np.ndarray) -> np.ndarray:
+    """Row-wise 5th percentile of an equal-length block, interpolated like np.percentile"""
+    pos = 0.05 * (block.shape[1] - 1)
+    lo = int(pos)
+    part = np.partition(block, (lo, lo + 1), axis=1)  # Partial sort, O(days) per row
+    return part[:, lo] + (pos - lo) * (part[:, lo + 1] - part[:, lo])
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _risk_kernel(R: np.ndarray, lengths: np.ndarray, market_values: np.ndarray, betas: np.ndarray):
+    """
+    Per-position volatility, VaR, weight and risk score
+    
+    R holds one row of daily returns per position, right-aligned so that row i's
+    data is its last lengths[i] entries. Returns (vol, var1d, var5d, weights, score).
+    """
+    n, days = R.shape
+    vol = np.zeros(n)
+    var1d = np.zeros(n)
+    weights = np.empty(n)
+    score = np.empty(n)
+    
+    for i in prange(n):
+        m = lengths[i]
+        
+        # Annualized volatility (sample std)
+        if m > 1:
+            r = R[i, days - m:]
+            mean = r.mean()
+            ss = 0.0
+            for k in range(m):
+                d = r[k] - mean
+                ss += d * d
+            vol[i] = np.sqrt(ss / (m - 1)) * np.sqrt(252.0)
+        
+        # 95% VaR: 5th percentile with linear interpolation, from a partial sort
+        if m > 10:
+            pos = 0.05 * (m - 1)
+            lo = int(pos)
+            part = np.partition(R[i, days - m:].copy(), lo + 1)
+            q_lo = part[:lo + 1].max()
+            var1d[i] = (q_lo + (pos - lo) * (part[lo + 1] - q_lo)) * market_values[i]
+        
+        weights[i] = abs(market_values[i]) / 100000  # Placeholder calculation
+        score[i] = min(100.0, vol[i] * 100 + weights[i] * 100 + abs(betas[i] - 1) * 50)
+    
+    return vol, var1d, np.sqrt(5.0) * var1d, weights, score
+
+if NUMBA_AVAILABLE:
+    _risk_kernel(np.zeros((2, 2)), np.full(2, 2, dtype=np.int64), np.ones(2), np.ones(2))
+
 class RiskLevel(Enum):
     LOW = "LOW"
     MEDIUM = "MEDIUM"
@@ -44,11 +113,18 @@ class PositionRisk:
     volatility: float
     risk_score: float
 
+class RiskArrays(NamedTuple):
+    """Per-position risk columns, parallel to the PositionRisk list"""
+    weights: np.ndarray
+    vols: np.ndarray
+    var1d: np.ndarray
+    var5d: np.ndarray
+
 class RiskManager:
     def __init__(self, portfolio_manager: IBKRPortfolioManager):
         self.pm = portfolio_manager
         self.logger = logging.getLogger(__name__)
-        self.alerts: List[RiskAlert] = []
+        self.db = self._open_alert_store(get_config('risk').get('alert_database', 'risk_alerts.db'))
         
         # Risk thresholds (configurable)
         self.risk_limits = {
@@ -62,11 +138,24 @@ class RiskManager:
             'margin_utilization_max': 0.8 # Max 80% margin usage
         }
     
-    async def analyze_portfolio_risk(self) -> Dict:
-        """Comprehensive portfolio risk analysis"""
+    async def analyze_portfolio_risk(self, positions_df: Optional[pd.DataFrame] = None,
+                                     account_summary: Optional[Dict] = None) -> Dict:
+        """
+        Comprehensive portfolio risk analysis
+        
+        Args:
+            positions_df: Positions already fetched by the caller (fetched if None)
+            account_summary: Account summary already fetched by the caller (fetched if None)
+        
+        Position risks and alerts are returned as plain dicts (alert level as its
+        string value, timestamp in ISO format), so results can be subscripted and
+        JSON-encoded.
+        """
         try:
-            positions_df = self.pm.get_portfolio_positions()
-            account_summary = self.pm.get_account_summary()
+            if positions_df is None:
+                positions_df = self.pm.get_portfolio_positions()
+            if account_summary is None:
+                account_summary = self.pm.get_account_summary()
             
             if positions_df.empty:
                 return {'error': 'No positions to analyze'}
@@ -75,23 +164,20 @@ class RiskManager:
             historical_data = await self._get_historical_data(positions_df)
             
             # Calculate individual position risks
-            position_risks = []
-            for _, position in positions_df.iterrows():
-                risk = await self._calculate_position_risk(position, historical_data)
-                position_risks.append(risk)
+            position_risks, risk_arrays = self._calculate_position_risks(positions_df, historical_data)
             
             # Calculate portfolio-level metrics
             portfolio_metrics = self._calculate_portfolio_metrics(
-                positions_df, position_risks, account_summary
+                positions_df, risk_arrays, account_summary
             )
             
             # Generate risk alerts
-            self._generate_risk_alerts(position_risks, portfolio_metrics)
+            self._generate_risk_alerts(position_risks, portfolio_metrics, datetime.now())
             
             return {
                 'position_risks': [self._risk_to_dict(r) for r in position_risks],
                 'portfolio_metrics': portfolio_metrics,
-                'alerts': [self._alert_to_dict(a) for a in self.alerts[-10:]],  # Last 10 alerts
+                'alerts': [self._alert_to_dict(a) for a in self._recent_alerts(10)],
                 'risk_score': self._calculate_overall_risk_score(portfolio_metrics),
                 'recommendations': self._generate_recommendations(position_risks, portfolio_metrics)
             }
@@ -100,86 +186,147 @@ class RiskManager:
             self.logger.error(f"Error in risk analysis: {e}")
             return {'error': str(e)}
     
-    async def _get_historical_data(self, positions_df: pd.DataFrame, days: int = 252) -> Dict:
-        """Get historical price data for volatility calculations"""
-        historical_data = {}
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=days)
-        
-        for _, position in positions_df.iterrows():
+    async def _get_historical_data(self, positions_df: pd.DataFrame, days: int = 252) -> Dict[str, np.ndarray]:
+        """Get daily simple returns per symbol for volatility calculations"""
+        # Requests run concurrently, kept under IBKR's cap of ~50 open historical requests
+        sem = asyncio.Semaphore(HISTORICAL_CONCURRENCY)
+        stocks = positions_df.loc[positions_df['SecType'] == 'STK',  # Skip non-stock instruments for now
+                                  ['Symbol', 'Exchange', 'Currency']]
+        contracts = [_stock(row.Symbol, row.Exchange, row.Currency)
+                     for row in stocks.itertuples(index=False, name='Pos')]
+        
+        # Only contracts never seen before need a qualification round-trip
+        unqualified = [c for c in contracts if not c.conId]
+        if unqualified:
             try:
-                # Create contract
-                if position['SecType'] == 'STK':
-                    contract = Stock(position['Symbol'], position['Exchange'], position['Currency'])
-                else:
-                    continue  # Skip non-stock instruments for now
-                
-                # Get historical bars
-                bars = self.pm.ib.reqHistoricalData(
-                    contract,
-                    endDateTime='',
-                    durationStr=f'{days} D',
-                    barSizeSetting='1 day',
-                    whatToShow='TRADES',
-                    useRTH=True,
-                    formatDate=1
-                )
-                
-                if bars:
-                    df = util.df(bars)
-                    df['returns'] = df['close'].pct_change().dropna()
-                    historical_data[position['Symbol']] = df
-                    
+                await self.pm.ib.qualifyContractsAsync(*unqualified)
             except Exception as e:
-                self.logger.warning(f"Could not get historical data for {position['Symbol']}: {e}")
+                self.logger.warning(f"Could not qualify contracts: {e}")
+        
+        today = pd.Timestamp(date.today())
+        results = await asyncio.gather(
+            *(self._one_hist(sem, contract, days, today) for contract in contracts),
+            return_exceptions=True
+        )
+        
+        historical_data = {}
+        for contract, history in zip(contracts, results):
+            if isinstance(history, Exception):
+                self.logger.warning(f"Could not get historical data for {contract.symbol}: {history}")
+            elif len(history) > 1:
+                closes = history['close'].to_numpy(dtype=np.float64)
+                historical_data[contract.symbol] = np.diff(closes) / closes[:-1]
                 
         return historical_data
     
-    async def _calculate_position_risk(self, position: pd.Series, historical_data: Dict) -> PositionRisk:
-        """Calculate risk metrics for individual position"""
-        symbol = position['Symbol']
-        
-        # Default values
-        volatility = 0.0
-        beta = 1.0
-        var_1d = 0.0
-        var_5d = 0.0
-        
-        if symbol in historical_data:
-            returns = historical_data[symbol]['returns']
+    async def _one_hist(self, sem: asyncio.Semaphore, contract: Stock, days: int,
+                        today: pd.Timestamp) -> pd.DataFrame:
+        """Daily closes for one stock, fetching only bars newer than the cache"""
+        path = Path(get_config('monitoring').get('history_cache_directory', 'cache')) / \
+            f"{contract.symbol.replace('/', '_')}.parquet"
+        cached = self._read_history(path)
+        
+        # Re-request the last cached day too, since its bar may have been partial
+        duration = days
+        if not cached.empty:
+            last_date = pd.Timestamp(cached['date'].iloc[-1])
+            duration = min(days, (today - last_date).days + 1)
+        
+        async with sem:
+            bars = await self.pm.ib.reqHistoricalDataAsync(
+                contract,
+                endDateTime='',
+                durationStr=f'{duration} D',
+                barSizeSetting='1 day',
+                whatToShow='TRADES',
+                useRTH=True,
+                formatDate=1
+            )
+        
+        if not bars:
+            return cached.tail(days)
+        
+        fresh = util.df(bars)[['date', 'close']]
+        history = pd.concat([cached, fresh], ignore_index=True) if not cached.empty else fresh
+        history = history.drop_duplicates('date', keep='last')
+        self._write_history(path, history)
+        return history.tail(days)
+    
+    def _read_history(self, path: Path) -> pd.DataFrame:
+        """Load cached daily closes, or an empty frame"""
+        if pyarrow is None or not path.exists():
+            return pd.DataFrame(columns=['date', 'close'])
+        try:
+            return pd.read_parquet(path, columns=['date', 'close'])
+        except Exception as e:
+            self.logger.warning(f"Ignoring unreadable history cache {path}: {e}")
+            return pd.DataFrame(columns=['date', 'close'])
+    
+    def _write_history(self, path: Path, history: pd.DataFrame):
+        """Store daily closes as Zstd-compressed Parquet"""
+        if pyarrow is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            history.to_parquet(path, compression='zstd', index=False)
+        except Exception as e:
+            self.logger.warning(f"Could not write history cache {path}: {e}")
+    
+    def _calculate_position_risks(self, positions_df: pd.DataFrame,
+                                  historical_data: Dict) -> Tuple[List[PositionRisk], RiskArrays]:
+        """Calculate risk metrics for every position in one vectorized pass"""
+        symbols = positions_df['Symbol'].tolist()
+        market_values = positions_df['Market Value'].to_numpy(dtype=float)
+        n = len(symbols)
+        
+        # Stack returns as positions x days, aligned on the latest bar and NaN-padded
+        # where a symbol has a shorter (or no) history
+        series = [historical_data.get(s, np.empty(0)) for s in symbols]
+        lengths = np.array([len(r) for r in series], dtype=np.int64)
+        days = int(lengths.max(initial=0))
+        R = np.full((n, days), np.nan)
+        for i, r in enumerate(series):
+            if len(r):
+                R[i, days - len(r):] = r
+        
+        # Beta calculation (simplified - would need market index data)
+        beta = np.ones(n)  # Placeholder
+        
+        if NUMBA_AVAILABLE:
+            volatility, var_1d, var_5d, portfolio_weight, risk_score = _risk_kernel(
+                R, lengths, market_values, beta
+            )
+        else:
+            # Volatility (annualized)
+            volatility = np.zeros(n)
+            has_vol = lengths > 1
+            if has_vol.any():
+                volatility[has_vol] = np.nanstd(R[has_vol], axis=1, ddof=1) * np.sqrt(252)
             
-            # Calculate volatility (annualized)
-            volatility = returns.std() * np.sqrt(252) if len(returns) > 1 else 0.0
+            # VaR (95% confidence), one partition per distinct history length
+            var_1d = np.zeros(n)
+            for m in np.unique(lengths[lengths > 10]):
+                rows = lengths == m
+                var_1d[rows] = _percentile5(R[rows, days - m:]) * market_values[rows]
+            var_5d = np.sqrt(5) * var_1d
             
-            # Calculate VaR (95% confidence)
-            if len(returns) > 10:
-                var_1d = np.percentile(returns, 5) * position['Market Value']
-                var_5d = np.sqrt(5) * var_1d
+            # Portfolio weight - approximating total portfolio value from position data
+            portfolio_weight = np.abs(market_values) / 100000  # Placeholder calculation
             
-            # Beta calculation (simplified - would need market index data)
-            beta = 1.0  # Placeholder
-        
-        # Calculate portfolio weight
-        # We'll need total portfolio value - approximating from position data
-        portfolio_weight = abs(position['Market Value']) / 100000  # Placeholder calculation
-        
-        # Risk score (0-100, higher = riskier)
-        risk_score = min(100, (volatility * 100) + (portfolio_weight * 100) + (abs(beta - 1) * 50))
-        
-        return PositionRisk(
-            symbol=symbol,
-            position_size=position['Position'],
-            market_value=position['Market Value'],
-            portfolio_weight=portfolio_weight,
-            var_1d=var_1d,
-            var_5d=var_5d,
-            beta=beta,
-            volatility=volatility,
-            risk_score=risk_score
-        )
+            # Risk score (0-100, higher = riskier)
+            risk_score = np.minimum(100, volatility * 100 + portfolio_weight * 100 + np.abs(beta - 1) * 50)
+        
+        position_risks = [
+            PositionRisk(*fields) for fields in zip(
+                symbols, positions_df['Position'].tolist(), market_values.tolist(),
+                portfolio_weight.tolist(), var_1d.tolist(), var_5d.tolist(),
+                beta.tolist(), volatility.tolist(), risk_score.tolist()
+            )
+        ]
+        return position_risks, RiskArrays(portfolio_weight, volatility, var_1d, var_5d)
     
     def _calculate_portfolio_metrics(self, positions_df: pd.DataFrame, 
-                                   position_risks: List[PositionRisk], 
+                                   arrays: RiskArrays, 
                                    account_summary: Dict) -> Dict:
         """Calculate portfolio-level risk metrics"""
         
@@ -187,18 +334,17 @@ class RiskManager:
         total_unrealized_pnl = float(account_summary.get('UnrealizedPnL', {}).get('value', 0))
         
         # Concentration risk
-        max_position_weight = max([r.portfolio_weight for r in position_risks]) if position_risks else 0
+        max_position_weight = float(arrays.weights.max(initial=0.0))
         
         # Portfolio volatility (simplified)
-        weighted_volatilities = [r.volatility * r.portfolio_weight for r in position_risks]
-        portfolio_volatility = sum(weighted_volatilities) if weighted_volatilities else 0
+        portfolio_volatility = float(arrays.weights @ arrays.vols)
         
         # VaR calculations
-        portfolio_var_1d = sum([r.var_1d for r in position_risks])
-        portfolio_var_5d = sum([r.var_5d for r in position_risks])
+        portfolio_var_1d = float(arrays.var1d.sum())
+        portfolio_var_5d = float(arrays.var5d.sum())
         
         # Diversification metrics
-        num_positions = len(position_risks)
+        num_positions = len(arrays.weights)
         diversification_ratio = min(1.0, num_positions / 20.0) if num_positions > 0 else 0
         
         # Margin utilization
@@ -218,18 +364,15 @@ class RiskManager:
             'return_on_equity': (total_unrealized_pnl / total_value * 100) if total_value > 0 else 0
         }
     
-    def _generate_risk_alerts(self, position_risks: List[PositionRisk], portfolio_metrics: Dict):
-        """Generate risk alerts based on thresholds"""
-        current_time = datetime.now()
-        
-        # Clear old alerts (keep only last hour)
-        self.alerts = [a for a in self.alerts if 
-                      current_time - a.timestamp < timedelta(hours=1)]
+    def _generate_risk_alerts(self, position_risks: List[PositionRisk], portfolio_metrics: Dict,
+                              current_time: datetime):
+        """Generate risk alerts based on thresholds, stamped with the analysis time"""
+        alerts: List[RiskAlert] = []
         
         # Position concentration alerts
         for risk in position_risks:
             if risk.portfolio_weight > self.risk_limits['max_position_weight']:
-                self.alerts.append(RiskAlert(
+                alerts.append(RiskAlert(
                     symbol=risk.symbol,
                     risk_type='Position Concentration',
                     level=RiskLevel.HIGH,
@@ -242,7 +385,7 @@ class RiskManager:
         
         # Portfolio volatility alert
         if portfolio_metrics['portfolio_volatility'] > self.risk_limits['max_portfolio_volatility']:
-            self.alerts.append(RiskAlert(
+            alerts.append(RiskAlert(
                 symbol='PORTFOLIO',
                 risk_type='High Volatility',
                 level=RiskLevel.MEDIUM,
@@ -255,7 +398,7 @@ class RiskManager:
         # VaR alerts
         var_pct = abs(portfolio_metrics['portfolio_var_1d']) / portfolio_metrics['total_portfolio_value']
         if var_pct > self.risk_limits['max_daily_var']:
-            self.alerts.append(RiskAlert(
+            alerts.append(RiskAlert(
                 symbol='PORTFOLIO',
                 risk_type='High Value at Risk',
                 level=RiskLevel.HIGH,
@@ -268,7 +411,7 @@ class RiskManager:
         
         # Margin utilization alert
         if portfolio_metrics['margin_utilization'] > self.risk_limits['margin_utilization_max']:
-            self.alerts.append(RiskAlert(
+            alerts.append(RiskAlert(
                 symbol='PORTFOLIO',
                 risk_type='High Margin Usage',
                 level=RiskLevel.CRITICAL,
@@ -278,6 +421,45 @@ class RiskManager:
                 timestamp=current_time,
                 action_required=True
             ))
+        
+        # Clear old alerts (keep only last hour) and record the new ones together
+        cutoff = current_time - timedelta(hours=1)
+        with self.db:
+            self.db.execute('DELETE FROM alerts WHERE ts <= ?', (cutoff.timestamp(),))
+            self.db.executemany(
+                'INSERT INTO alerts VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(a.timestamp.timestamp(), a.symbol, a.risk_type, a.level.value, a.message,
+                  a.value, a.threshold, a.action_required) for a in alerts]
+            )
+    
+    @staticmethod
+    def _open_alert_store(path: str) -> sqlite3.Connection:
+        """Open the alert history database, creating the table on first use"""
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS alerts (
+                ts REAL, symbol TEXT, risk_type TEXT, level TEXT, message TEXT,
+                value REAL, threshold REAL, action_required INTEGER
+            )""")
+        db.execute('CREATE INDEX IF NOT EXISTS alerts_ts ON alerts (ts)')
+        return db
+    
+    def _recent_alerts(self, limit: int) -> List[RiskAlert]:
+        """Newest alerts from the store, oldest first"""
+        rows = self.db.execute(
+            'SELECT * FROM alerts ORDER BY ts DESC LIMIT ?', (limit,)
+        ).fetchall()
+        return [
+            RiskAlert(symbol=symbol, risk_type=risk_type, level=RiskLevel(level), message=message,
+                      value=value, threshold=threshold, timestamp=datetime.fromtimestamp(ts),
+                      action_required=bool(action_required))
+            for ts, symbol, risk_type, level, message, value, threshold, action_required in reversed(rows)
+        ]
+    
+    def close(self):
+        """Close the alert store"""
+        self.db.close()
     
     def _calculate_overall_risk_score(self, portfolio_metrics: Dict) -> float:
         """Calculate overall portfolio risk score (0-100)"""
@@ -345,30 +527,14 @@ class RiskManager:
     
     def _risk_to_dict(self, risk: PositionRisk) -> Dict:
         """Convert PositionRisk to dictionary"""
-        return {
-            'symbol': risk.symbol,
-            'position_size': risk.position_size,
-            'market_value': risk.market_value,
-            'portfolio_weight': risk.portfolio_weight,
-            'var_1d': risk.var_1d,
-            'var_5d': risk.var_5d,
-            'beta': risk.beta,
-            'volatility': risk.volatility,
-            'risk_score': risk.risk_score
-        }
+        return asdict(risk)
     
     def _alert_to_dict(self, alert: RiskAlert) -> Dict:
         """Convert RiskAlert to dictionary"""
-        return {
-            'symbol': alert.symbol,
-            'risk_type': alert.risk_type,
-            'level': alert.level.value,
-            'message': alert.message,
-            'value': alert.value,
-            'threshold': alert.threshold,
-            'timestamp': alert.timestamp.isoformat(),
-            'action_required': alert.action_required
-        }
+        data = asdict(alert)
+        data['level'] = alert.level.value
+        data['timestamp'] = alert.timestamp.isoformat()
+        return data
 
 # Usage example
 async def main():
@@ -379,7 +545,9 @@ async def main():
         risk_manager = RiskManager(pm)
         
         print("🔍 Analyzing portfolio risk...")
-        risk_analysis = await risk_manager.analyze_portfolio_risk()
+        risk_analysis = await risk_manager.analyze_portfolio_risk(
+            pm.get_portfolio_positions(), pm.get_account_summary()
+        )
         
         if 'error' not in risk_analysis:
             print(f"\n📊 Portfolio Risk Score: {risk_analysis['risk_score']:.1f}/100")
@@ -393,6 +561,7 @@ async def main():
             for i, rec in enumerate(risk_analysis['recommendations'], 1):
                 print(f"  {i}. {rec}")
         
+        risk_manager.close()
         pm.disconnect()
 
 if __name__ == "__main__":
@@ -0,0 +1,24 @@
+"""
+Lexicon sentiment scoring through TextBlob's public pattern analyzer
+Scores equal TextBlob(text.lower()).sentiment.polarity without building a TextBlob
+per text; the analyzer and its lexicon are loaded once and shared.
+"""
+
+from typing import List
+
+import numpy as np
+from textblob.sentiments import PatternAnalyzer
+
+# Shared by every SentimentAnalyzer; the lexicon loads on first use
+_ANALYZER = PatternAnalyzer()
+
+def lexicon_polarity(text: str) -> float:
+    """Polarity of one text (-1 to 1)"""
+    return float(_ANALYZER.analyze(text.lower()).polarity)
+
+def lexicon_polarities(texts: List[str]) -> np.ndarray:
+    """Polarity of many texts (-1 to 1 each)"""
+    return np.fromiter((lexicon_polarity(text) for text in texts),
+                       dtype=np.float64, count=len(texts))
+
+__all__ = ['lexicon_polarity', 'lexicon_polarities']
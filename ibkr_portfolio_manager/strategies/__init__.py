@@ -4,6 +4,8 @@ Strategies Package for IBKR Portfolio Manager
 Collection of trading strategies for automated trading
 """
 
+from functools import lru_cache
+
 # Import all available strategies
 from .moving_average import MovingAverageCrossoverStrategy
 from .rsi_strategy import (
@@ -33,14 +35,24 @@ AVAILABLE_STRATEGIES = {
 
 # Strategy categories
 STRATEGY_CATEGORIES = {
-    'Trend Following': ['ma_cross_10_20', 'ma_cross_5_15', 'ma_cross_20_50'],
-    'Mean Reversion': ['rsi_standard', 'rsi_conservative', 'rsi_aggressive', 'rsi_scalping'],
+    'Trend Following': ('ma_cross_10_20', 'ma_cross_5_15', 'ma_cross_20_50'),
+    'Mean Reversion': ('rsi_standard', 'rsi_conservative', 'rsi_aggressive', 'rsi_scalping'),
 }
 
-def get_strategy(name: str):
-    """Get a strategy instance by name"""
+@lru_cache(maxsize=None)
+def _make(name: str):
+    """Shared instance of a registered strategy, built once"""
+    return AVAILABLE_STRATEGIES[name]()
+
+def get_strategy(name: str, fresh: bool = True):
+    """
+    Get a strategy instance by name
+    
+    fresh=False returns a shared cached instance, for read-only introspection;
+    the default builds a new one since strategies keep per-instance counters.
+    """
     if name in AVAILABLE_STRATEGIES:
-        return AVAILABLE_STRATEGIES[name]()
+        return AVAILABLE_STRATEGIES[name]() if fresh else _make(name)
     else:
         available = ', '.join(AVAILABLE_STRATEGIES.keys())
         raise ValueError(f"Strategy '{name}' not found. Available: {available}")
@@ -49,23 +61,25 @@ def list_strategies() -> dict:
     """List all available strategies with descriptions"""
     strategies = {}
     
-    for name, strategy_factory in AVAILABLE_STRATEGIES.items():
+    for name in AVAILABLE_STRATEGIES:
         try:
-            strategy = strategy_factory()
+            strategy = _make(name)
             strategies[name] = {
                 'name': strategy.name,
                 'description': strategy.description,
-                'parameters': strategy.parameters
+                'parameters': dict(strategy.parameters)
             }
         except Exception as e:
             strategies[name] = {'error': str(e)}
     
     return strategies
 
-def get_strategies_by_category(category: str) -> list:
-    """Get strategies by category"""
+def get_strategies_by_category(category: str, fresh: bool = True) -> list:
+    """Get strategies by category (fresh=False returns the shared cached instances)"""
     if category in STRATEGY_CATEGORIES:
-        return [get_strategy(name) for name in STRATEGY_CATEGORIES[category]]
+        if not fresh:
+            return [_make(name) for name in STRATEGY_CATEGORIES[category]]
+        return [AVAILABLE_STRATEGIES[name]() for name in STRATEGY_CATEGORIES[category]]
     else:
         available_categories = ', '.join(STRATEGY_CATEGORIES.keys())
         raise ValueError(f"Category '{category}' not found. Available: {available_categories}")
@@ -145,7 +159,7 @@ if __name__ == "__main__":
         print(f"\n{category}:")
         for name in strategy_names:
             try:
-                strategy = get_strategy(name)
+                strategy = get_strategy(name, fresh=False)
                 print(f"  • {name}: {strategy.description}")
             except Exception as e:
                 print(f"  • {name}: Error - {e}")
@@ -0,0 +1,144 @@
+"""
+Compiled per-symbol kernel for the Moving Average Crossover strategy
+Runs as plain NumPy when numba is not installed (see jit.py)
+"""
+
+import numpy as np
+
+from jit import njit, NUMBA_AVAILABLE
+
+# Optional bottleneck for full moving average curves
+try:
+    import bottleneck as bn
+    BOTTLENECK_AVAILABLE = True
+except ImportError:
+    BOTTLENECK_AVAILABLE = False
+
+FFT_CONVOLVE_MIN_LENGTH = 65536  # Above this, FFT convolution beats the direct loop
+
+def _sma_conv(close: np.ndarray, window: int) -> np.ndarray:
+    """Moving average as a 'valid' convolution with a uniform kernel (len - window + 1 values)"""
+    kernel = np.ones(window, dtype=np.float64) / window
+    if close.size > FFT_CONVOLVE_MIN_LENGTH:
+        try:
+            from scipy.signal import fftconvolve
+            return fftconvolve(close, kernel, mode='valid')
+        except ImportError:
+            pass
+    return np.convolve(close, kernel, mode='valid')
+
+def sma(values, window: int) -> np.ndarray:
+    """
+    Simple moving average curve, NaN for the first window-1 bars like rolling().mean()
+    
+    Uses bottleneck.move_mean when installed, otherwise a uniform-kernel convolution.
+    """
+    a = np.asarray(values, dtype=np.float64)
+    if BOTTLENECK_AVAILABLE:
+        return bn.move_mean(a, window=window, min_count=window)
+    
+    out = np.full(a.size, np.nan)
+    if a.size >= window:
+        out[window - 1:] = _sma_conv(a, window)
+    return out
+
+def detect_crossovers(prev_fast: np.ndarray, prev_slow: np.ndarray, current_fast: np.ndarray,
+                      current_slow: np.ndarray, max_conf: float):
+    """
+    Branchless crossover detection for a batch of symbols
+    
+    Returns (direction, base_confidence): direction is 1 for a golden cross, -1 for a
+    death cross and 0 otherwise; confidence is 0 where there is no cross.
+    """
+    buy = (prev_fast <= prev_slow) & (current_fast > current_slow)
+    sell = (prev_fast >= prev_slow) & (current_fast < current_slow)
+    spread_buy = (current_fast - current_slow) / current_slow
+    spread_sell = (current_slow - current_fast) / current_fast
+    confidence = np.where(buy, np.clip(spread_buy * 20, 0.1, max_conf),
+                          np.where(sell, np.clip(spread_sell * 20, 0.1, max_conf), 0.0))
+    return buy.astype(np.int8) - sell.astype(np.int8), confidence
+
+@njit(cache=True, nogil=True)
+def _return_volatility(tail: np.ndarray) -> float:
+    """Sample std of the simple daily returns of tail"""
+    m = tail.size - 1
+    returns = np.empty(m)
+    for k in range(m):
+        returns[k] = (tail[k + 1] - tail[k]) / tail[k]
+    mean = returns.sum() / m
+    ss = 0.0
+    for k in range(m):
+        d = returns[k] - mean
+        ss += d * d
+    return np.sqrt(ss / (m - 1))
+
+@njit(cache=True, nogil=True)
+def _apply_filters(base_confidence: float, volume_ratio: float, price_trend: float,
+                   volatility: float) -> float:
+    """Adjust confidence from precomputed volume ratio, 5-bar trend and volatility"""
+    confidence = base_confidence
+
+    # Volume filter
+    if volume_ratio > 1.5:
+        confidence *= 1.2
+    elif volume_ratio < 0.5:
+        confidence *= 0.8
+
+    # Trend filter: more than 2% move over the last 5 bars
+    if abs(price_trend) > 0.02 and base_confidence > 0:
+        confidence *= 1.1
+
+    # Volatility filter: last 20 daily returns (19 with only 20 bars)
+    if volatility > 0.05:
+        confidence *= 0.9
+    return confidence
+
+@njit(cache=True, nogil=True)
+def analyze(close: np.ndarray, volume: np.ndarray, fast: int, slow: int,
+            min_vol: float, min_conf: float, max_conf: float):
+    """
+    Crossover detection, filters and final confidence for one symbol
+
+    Returns (signal, confidence, current_fast, current_slow, volume_ratio) where
+    signal is 1 for BUY, -1 for SELL and 0 when no signal passes.
+    """
+    n = close.size
+    if n < slow + 5:
+        return 0, 0.0, 0.0, 0.0, 0.0
+
+    # Moving averages: only the last two values of each are used
+    current_fast = close[n - fast:].mean()
+    current_slow = close[n - slow:].mean()
+    prev_fast = close[n - fast - 1:n - 1].mean()
+    prev_slow = close[n - slow - 1:n - 1].mean()
+
+    # Volume requirement
+    current_volume = volume[volume.size - 1]
+    avg_volume = volume[max(0, volume.size - 20):].mean()
+    volume_ratio = current_volume / max(avg_volume, 1.0)
+    if current_volume < min_vol:
+        return 0, 0.0, current_fast, current_slow, volume_ratio
+
+    # Golden cross (BUY) / death cross (SELL), confidence from crossover strength
+    if prev_fast <= prev_slow and current_fast > current_slow:
+        signal = 1
+        spread_pct = (current_fast - current_slow) / current_slow
+    elif prev_fast >= prev_slow and current_fast < current_slow:
+        signal = -1
+        spread_pct = (current_slow - current_fast) / current_fast
+    else:
+        return 0, 0.0, current_fast, current_slow, volume_ratio
+    base_confidence = min(max_conf, max(0.1, spread_pct * 20))
+
+    # Filter inputs, each computed once from the arrays
+    price_trend = (close[n - 1] - close[n - 5]) / close[n - 5]
+    volatility = _return_volatility(close[max(0, n - 21):])
+    confidence = _apply_filters(base_confidence, volume_ratio, price_trend, volatility)
+
+    confidence = min(max_conf, max(0.0, confidence))
+    if confidence < min_conf:
+        return 0, confidence, current_fast, current_slow, volume_ratio
+    return signal, confidence, current_fast, current_slow, volume_ratio
+
+if NUMBA_AVAILABLE:
+    analyze(np.ones(30), np.ones(30), 10, 20, 0.0, 0.2, 0.8)
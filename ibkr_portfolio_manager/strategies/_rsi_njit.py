@@ -0,0 +1,243 @@
+"""
+Compiled kernels for the RSI Mean Reversion strategy
+Without numba, RSI falls back to scipy's lfilter, then to the plain Python loop.
+Wilder-smoothed RSI uses TA-Lib's C implementation when it is installed.
+"""
+
+import numpy as np
+
+from jit import njit, prange, NUMBA_AVAILABLE
+
+try:
+    import talib
+    TALIB_AVAILABLE = True
+except ImportError:
+    TALIB_AVAILABLE = False
+
+@njit(cache=True, nogil=True)
+def _rsi_kernel(close: np.ndarray, alpha: float) -> np.ndarray:
+    """EMA RSI loop for smoothing factor alpha"""
+    n = close.size
+    out = np.empty(n)
+    if n == 0:
+        return out
+    
+    avg_gain = 0.0
+    avg_loss = 0.0
+    out[0] = np.nan
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        avg_gain = avg_gain * (1 - alpha) + gain * alpha
+        avg_loss = avg_loss * (1 - alpha) + loss * alpha
+        
+        if avg_loss > 0:
+            out[i] = 100 - 100 / (1 + avg_gain / avg_loss)
+        elif avg_gain > 0:
+            out[i] = 100.0
+        else:
+            out[i] = np.nan
+    return out
+
+def _rsi_loop(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    RSI from EMA-smoothed gains and losses in one pass
+
+    Matches Series.ewm(span=period, adjust=False).mean() on the diff-based gains
+    and losses: the first bar is NaN, 100 when there are no losses.
+    """
+    return _rsi_kernel(close, 2.0 / (period + 1))
+
+@njit(cache=True, nogil=True)
+def _wilder_rsi_loop(close: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilder RSI as computed by talib.RSI
+    
+    Averages are seeded with the mean of the first period changes, then smoothed
+    with alpha = 1/period; the first period bars are NaN.
+    """
+    n = close.size
+    out = np.full(n, np.nan)
+    if n <= period:
+        return out
+    
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    avg_gain /= period
+    avg_loss /= period
+    
+    for i in range(period, n):
+        if i > period:
+            delta = close[i] - close[i - 1]
+            gain = delta if delta > 0 else 0.0
+            loss = -delta if delta < 0 else 0.0
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        total = avg_gain + avg_loss
+        out[i] = 100 * avg_gain / total if total != 0 else 0.0
+    return out
+
+@njit(cache=True, nogil=True)
+def _rsi_value(avg_gain: float, avg_loss: float, wilder: bool) -> float:
+    """RSI from smoothed averages, with the edge cases of the matching full kernel"""
+    if wilder:
+        total = avg_gain + avg_loss
+        return 100 * avg_gain / total if total != 0 else 0.0
+    if avg_loss > 0:
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+    return 100.0 if avg_gain > 0 else np.nan
+
+@njit(cache=True, nogil=True)
+def rsi_seed(close: np.ndarray, period: int, wilder: bool):
+    """
+    Where the RSI recursion starts: (start, avg_gain, avg_loss)
+    
+    EMA smoothing starts at bar 1 from zero averages; Wilder's is seeded with the
+    mean of the first period changes (needs more than period bars).
+    """
+    if not wilder:
+        return 1, 0.0, 0.0
+    
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for i in range(1, period + 1):
+        delta = close[i] - close[i - 1]
+        if delta > 0:
+            avg_gain += delta
+        else:
+            avg_loss -= delta
+    return period + 1, avg_gain / period, avg_loss / period
+
+@njit(cache=True, nogil=True)
+def rsi_update(close: np.ndarray, start: int, avg_gain: float, avg_loss: float,
+               period: int, wilder: bool):
+    """Advance the averages over close[start:], returning (rsi of those bars, avg_gain, avg_loss)"""
+    n = close.size
+    out = np.empty(max(0, n - start))
+    alpha = 2.0 / (period + 1)
+    for i in range(start, n):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+        if wilder:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        else:
+            avg_gain = avg_gain * (1 - alpha) + gain * alpha
+            avg_loss = avg_loss * (1 - alpha) + loss * alpha
+        out[i - start] = _rsi_value(avg_gain, avg_loss, wilder)
+    return out, avg_gain, avg_loss
+
+@njit(parallel=True, cache=True, nogil=True)
+def rsi_batch(C: np.ndarray, lengths: np.ndarray, period: int, wilder: bool, tail: int):
+    """
+    RSI for many symbols at once, one symbol per row in parallel
+    
+    C holds one row of closes per symbol, right-aligned so that row j's data is its
+    last lengths[j] entries (each longer than period). Returns (tails, avg_gain,
+    avg_loss): the last `tail` RSI values and the final averages of every row.
+    """
+    n, days = C.shape
+    tails = np.full((n, tail), np.nan)
+    gains = np.empty(n)
+    losses = np.empty(n)
+    
+    for j in prange(n):
+        close = C[j, days - lengths[j]:]
+        start, avg_gain, avg_loss = rsi_seed(close, period, wilder)
+        out, avg_gain, avg_loss = rsi_update(close, start, avg_gain, avg_loss, period, wilder)
+        k = min(out.size, tail)
+        tails[j, tail - k:] = out[out.size - k:]
+        gains[j] = avg_gain
+        losses[j] = avg_loss
+    
+    return tails, gains, losses
+
+@njit(cache=True, nogil=True)
+def apply_filters(base_confidence: float, volume_ratio: float, current_rsi: float,
+                  rsi_slope: float, has_rsi_trend: bool, recent_returns: float,
+                  volatility: float, n_closes: int, max_confidence: float) -> float:
+    """Adjust confidence from precomputed volume ratio, RSI slope, 5-bar return and volatility"""
+    confidence = base_confidence
+    
+    # Volume filter
+    if volume_ratio > 1.5:
+        confidence *= 1.15  # Boost for high volume
+    elif volume_ratio < 0.7:
+        confidence *= 0.85  # Penalty for low volume
+    
+    # RSI trend filter: rising out of oversold / falling out of overbought
+    if has_rsi_trend and base_confidence > 0:
+        if current_rsi < 35:
+            if rsi_slope > 0:
+                confidence *= 1.1
+        elif current_rsi > 65:
+            if rsi_slope < 0:
+                confidence *= 1.1
+    
+    # Price momentum filter: penalize momentum that runs against the trade
+    if n_closes >= 10 and base_confidence > 0:
+        if current_rsi < 35 and recent_returns < -0.02:
+            confidence *= 0.9
+        elif current_rsi > 65 and recent_returns > 0.02:
+            confidence *= 0.9
+    
+    # Volatility filter: RSI works better in normal volatility environments
+    if n_closes >= 20:
+        if volatility > 0.06:
+            confidence *= 0.85
+        elif volatility < 0.02:
+            confidence *= 1.05
+    
+    return min(max_confidence, max(0.0, confidence))
+
+def wilder_rsi(close: np.ndarray, period: int) -> np.ndarray:
+    """Wilder-smoothed RSI, through TA-Lib when available"""
+    if TALIB_AVAILABLE:
+        return talib.RSI(close, timeperiod=period)
+    return _wilder_rsi_loop(close, period)
+
+def _rsi_lfilter(close: np.ndarray, period: int) -> np.ndarray:
+    """Same RSI with both EMAs run as first-order IIR filters (scipy.signal.lfilter)"""
+    if close.size == 0:
+        return np.empty(0)
+    
+    alpha = 2.0 / (period + 1)
+    delta = np.empty_like(close)
+    delta[0] = 0.0
+    np.subtract(close[1:], close[:-1], out=delta[1:])
+    gains = np.maximum(delta, 0.0)
+    np.negative(delta, out=delta)  # Reuse the buffer for the losses
+    losses = np.maximum(delta, 0.0, out=delta)
+    avg_gain = lfilter([alpha], [1.0, alpha - 1.0], gains)
+    avg_loss = lfilter([alpha], [1.0, alpha - 1.0], losses)
+    
+    out = np.where(avg_gain > 0, 100.0, np.nan)
+    has_loss = avg_loss > 0
+    np.divide(avg_gain, avg_loss, out=out, where=has_loss)
+    out[has_loss] = 100 - 100 / (1 + out[has_loss])
+    out[0] = np.nan
+    return out
+
+if NUMBA_AVAILABLE:
+    rsi = _rsi_loop
+    rsi(np.ones(30), 14)
+    _wilder_rsi_loop(np.ones(30), 14)
+    apply_filters(0.5, 1.0, 30.0, 1.0, True, 0.0, 0.01, 30, 0.8)
+    for _wilder in (False, True):
+        _start, _gain, _loss = rsi_seed(np.ones(30), 14, _wilder)
+        rsi_update(np.ones(30), _start, _gain, _loss, 14, _wilder)
+        rsi_batch(np.ones((2, 30)), np.full(2, 30, dtype=np.int64), 14, _wilder, 5)
+else:
+    try:
+        from scipy.signal import lfilter
+        rsi = _rsi_lfilter
+    except ImportError:
+        rsi = _rsi_loop
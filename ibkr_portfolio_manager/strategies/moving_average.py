@@ -4,14 +4,22 @@ Moving Average Crossover Strategy
 Clean implementation for IBKR Strategy Engine
 """
 
+import asyncio
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 import logging
+from collections import OrderedDict, deque
 
 # Import base strategy class
-from strategy_engine import BaseStrategy, TradingSignal, SignalType
+from strategy_engine import BaseStrategy, TradingSignal, BUY, SELL
+from ._ma_njit import analyze, detect_crossovers, sma
+
+_NO_VOLUME = np.zeros(1)  # Stand-in volume history for data without a volume column
+FLOAT32_TIE_TOLERANCE = 1e-4  # Relative MA gap below which the float32 screen defers to float64
+ANALYSIS_CACHE_SIZE = 1024  # (symbol, last bar) results kept between polls
 
 class MovingAverageCrossoverStrategy(BaseStrategy):
     """
@@ -42,6 +50,18 @@ class MovingAverageCrossoverStrategy(BaseStrategy):
         
         super().__init__(name, description, parameters)
         
+        # Parameter-derived constants for the per-symbol hot path
+        self._fast = fast_period
+        self._slow = slow_period
+        self._required = slow_period + 5
+        self._min_volume = float(min_volume)
+        
+        # Per-symbol running sums for streaming bars (see update / warm_up)
+        self._streams = {}
+        
+        # LRU of _crossover results keyed by (symbol, last bar time, length, last close)
+        self._cache = OrderedDict()
+        
         # Strategy-specific settings
         self.min_confidence = 0.2
         self.max_confidence = 0.8
@@ -49,72 +69,129 @@ class MovingAverageCrossoverStrategy(BaseStrategy):
         self.logger.info(f"Initialized MA Crossover: {fast_period}/{slow_period} periods, "
                         f"{position_size_pct:.1%} position size")
     
-    async def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[TradingSignal]:
+    async def generate_signals(self, market_data: Dict[str, pd.DataFrame],
+                               now: Optional[datetime] = None) -> List[TradingSignal]:
         """Generate moving average crossover signals"""
-        signals = []
+        fast = self._fast
+        slow = self._slow
+        required_periods = self._required
         
+        # Gather the last slow+1 closes of every symbol with enough history.
+        # float32 is plenty to screen for crossovers; the kernel rechecks in float64.
+        closes = np.empty((len(market_data), slow + 1), dtype=np.float32)
+        symbols = [None] * len(market_data)
+        frames = [None] * len(market_data)
+        n = 0
         for symbol, df in market_data.items():
             try:
-                signal = self._analyze_symbol(symbol, df)
-                if signal:
-                    signals.append(signal)
-                    
+                if len(df) < required_periods:
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug(f"Insufficient data for {symbol}: {len(df)} < {required_periods} bars")
+                    continue
+                closes[n] = df['close'].to_numpy()[-slow - 1:]
+                symbols[n] = symbol
+                frames[n] = df
+                n += 1
+                
             except Exception as e:
                 self.logger.error(f"Error analyzing {symbol}: {e}")
                 continue
         
+        # Current and previous MAs for all symbols at once (symbols x bars)
+        closes = closes[:n]
+        current_fast = closes[:, -fast:].mean(axis=1)
+        current_slow = closes[:, 1:].mean(axis=1)
+        prev_fast = closes[:, -fast - 1:-1].mean(axis=1)
+        prev_slow = closes[:, :-1].mean(axis=1)
+        direction, _ = detect_crossovers(prev_fast, prev_slow, current_fast, current_slow,
+                                         self.max_confidence)
+        # Near-ties could round either way in float32, so they go to the kernel too
+        near_tie = ((np.abs(prev_fast - prev_slow) <= FLOAT32_TIE_TOLERANCE * np.abs(prev_slow)) |
+                    (np.abs(current_fast - current_slow) <= FLOAT32_TIE_TOLERANCE * np.abs(current_slow)))
+        crossed = np.flatnonzero((direction != 0) | near_tie)
+        
+        # Only symbols with a crossover go through the compiled kernel and sizing,
+        # spread over worker threads (the kernel releases the GIL)
+        timestamp = now or datetime.now()  # One timestamp for the whole batch
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        results = await asyncio.gather(
+            *(self._analyze_in_thread(semaphore, symbols[i], frames[i], timestamp) for i in crossed),
+            return_exceptions=True
+        )
+        signals = []
+        for i, result in zip(crossed, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error analyzing {symbols[i]}: {result}")
+            elif result is not None:
+                signals.append(result)
+        
         self.logger.info(f"Generated {len(signals)} signals from {len(market_data)} symbols")
         return signals
     
-    def _analyze_symbol(self, symbol: str, df: pd.DataFrame) -> TradingSignal:
-        """Analyze a single symbol for crossover signals"""
-        
-        # Check if we have enough data
-        required_periods = self.parameters['slow_period'] + 5
-        if len(df) < required_periods:
-            self.logger.debug(f"Insufficient data for {symbol}: {len(df)} < {required_periods} bars")
-            return None
-        
-        # Calculate moving averages
-        fast_ma = df['close'].rolling(window=self.parameters['fast_period']).mean()
-        slow_ma = df['close'].rolling(window=self.parameters['slow_period']).mean()
-        
-        # Get recent values
-        current_fast = fast_ma.iloc[-1]
-        current_slow = slow_ma.iloc[-1]
-        prev_fast = fast_ma.iloc[-2]
-        prev_slow = slow_ma.iloc[-2]
+    async def _analyze_in_thread(self, semaphore: asyncio.Semaphore, symbol: str,
+                                 df: pd.DataFrame, timestamp: datetime) -> Optional[TradingSignal]:
+        """Run the crossover kernel in the default thread pool, bounded by semaphore and memoized per bar"""
+        # Same bars as last poll: reuse the kernel result, but stamp a fresh signal
+        # Engine frames have a RangeIndex over a fixed window, so the bar time is the 'date' column
+        last_bar = df['date'].iat[-1] if 'date' in df.columns else df.index[-1]
+        key = (symbol, last_bar, len(df), float(df['close'].to_numpy()[-1]))
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            result = self._cache[key]
+        else:
+            async with semaphore:
+                result = await asyncio.to_thread(self._crossover, symbol, df)
+            
+            self._cache[key] = result
+            if len(self._cache) > ANALYSIS_CACHE_SIZE:
+                self._cache.popitem(last=False)
         
-        # Current price and volume
-        current_price = df['close'].iloc[-1]
-        current_volume = df.get('volume', pd.Series([0])).iloc[-1]
-        avg_volume = df.get('volume', pd.Series([0])).tail(20).mean()
+        return self._build_signal(symbol, result, timestamp)
+    
+    def _analyze_symbol(self, symbol: str, df: pd.DataFrame,
+                        timestamp: Optional[datetime] = None) -> Optional[TradingSignal]:
+        """Analyze a single symbol for crossover signals"""
+        return self._build_signal(symbol, self._crossover(symbol, df), timestamp)
+    
+    def _crossover(self, symbol: str, df: pd.DataFrame) -> Optional[Tuple[int, float, float, float, float, float]]:
+        """
+        Numeric work for one symbol (in _ma_njit.analyze)
         
-        # Check volume requirement
-        if current_volume < self.parameters['min_volume']:
-            self.logger.debug(f"Volume too low for {symbol}: {current_volume}")
+        Returns (code, confidence, current_fast, current_slow, volume_ratio, price) when
+        a signal passes, otherwise None.
+        """
+        close = np.ascontiguousarray(df['close'].values, dtype=np.float64)
+        if 'volume' in df.columns:
+            volume = np.ascontiguousarray(df['volume'].values, dtype=np.float64)
+        elif self._min_volume > 0:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Volume too low for {symbol}: 0")
             return None
+        else:
+            volume = _NO_VOLUME
         
-        # Detect crossovers
-        signal_type, confidence = self._detect_crossover(
-            prev_fast, prev_slow, current_fast, current_slow
+        code, confidence, current_fast, current_slow, volume_ratio = analyze(
+            close, volume, self._fast, self._slow,
+            self._min_volume, self.min_confidence, self.max_confidence
         )
         
-        if signal_type == SignalType.HOLD:
+        if code == 0:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"No signal for {symbol} (confidence={confidence:.2%})")
             return None
-        
-        # Apply additional filters
-        confidence = self._apply_filters(symbol, df, confidence, current_volume, avg_volume)
-        
-        if confidence < self.min_confidence:
-            self.logger.debug(f"Confidence too low for {symbol}: {confidence:.2%}")
+        return code, confidence, current_fast, current_slow, volume_ratio, close[-1]
+    
+    def _build_signal(self, symbol: str, result: Optional[Tuple[int, float, float, float, float, float]],
+                      timestamp: Optional[datetime] = None) -> Optional[TradingSignal]:
+        """Turn a _crossover result into a signal stamped with timestamp (now when omitted)"""
+        if result is None:
             return None
         
+        code, confidence, current_fast, current_slow, volume_ratio, current_price = result
+        signal_type = BUY if code > 0 else SELL
+        
         # Calculate position size
-        quantity = self.calculate_position_size(
-            TradingSignal(symbol, signal_type, confidence, current_price, 0, self.name, datetime.now()),
-            100000  # Default portfolio value
-        )
+        quantity = self.calculate_quantity(current_price, 100000)  # Default portfolio value
         
         # Create signal
         signal = TradingSignal(
@@ -124,78 +201,69 @@ class MovingAverageCrossoverStrategy(BaseStrategy):
             price=current_price,
             quantity=quantity,
             strategy_name=self.name,
-            timestamp=datetime.now(),
+            timestamp=timestamp or datetime.now(),
             metadata={
                 'fast_ma': round(current_fast, 2),
                 'slow_ma': round(current_slow, 2),
                 'ma_spread': round(abs(current_fast - current_slow), 2),
-                'volume_ratio': round(current_volume / max(avg_volume, 1), 2),
-                'crossover_type': 'golden' if signal_type == SignalType.BUY else 'death'
+                'volume_ratio': round(volume_ratio, 2),
+                'crossover_type': 'golden' if signal_type == BUY else 'death'
             }
         )
         
-        self.logger.info(f"{signal_type.value} signal for {symbol}: "
-                        f"price=${current_price:.2f}, confidence={confidence:.1%}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"{signal_type.value} signal for {symbol}: "
+                            f"price=${current_price:.2f}, confidence={confidence:.1%}")
         
         return signal
     
-    def _detect_crossover(self, prev_fast: float, prev_slow: float, 
-                         current_fast: float, current_slow: float) -> tuple:
-        """Detect MA crossover and calculate base confidence"""
-        
-        signal_type = SignalType.HOLD
-        confidence = 0.0
-        
-        # Golden Cross: fast MA crosses above slow MA (bullish)
-        if prev_fast <= prev_slow and current_fast > current_slow:
-            signal_type = SignalType.BUY
-            # Confidence based on crossover strength
-            spread_pct = (current_fast - current_slow) / current_slow
-            confidence = min(self.max_confidence, max(0.1, spread_pct * 20))
-            
-        # Death Cross: fast MA crosses below slow MA (bearish)
-        elif prev_fast >= prev_slow and current_fast < current_slow:
-            signal_type = SignalType.SELL
-            spread_pct = (current_slow - current_fast) / current_fast
-            confidence = min(self.max_confidence, max(0.1, spread_pct * 20))
-        
-        return signal_type, confidence
+    def warm_up(self, symbol: str, prices) -> Optional[Tuple[float, float, float, float]]:
+        """Seed the streaming MA state for a symbol from its price history"""
+        self._streams.pop(symbol, None)
+        result = None
+        for price in prices[-(self._slow + 1):]:
+            result = self.update(symbol, price)
+        return result
     
-    def _apply_filters(self, symbol: str, df: pd.DataFrame, base_confidence: float,
-                      current_volume: float, avg_volume: float) -> float:
-        """Apply additional filters to adjust confidence"""
+    def update(self, symbol: str, price: float) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Push one new bar in O(1) using running sums
         
-        confidence = base_confidence
-        
-        # Volume filter: boost confidence for high volume
-        volume_ratio = current_volume / max(avg_volume, 1)
-        if volume_ratio > 1.5:
-            confidence *= 1.2  # 20% boost for high volume
-        elif volume_ratio < 0.5:
-            confidence *= 0.8  # 20% penalty for low volume
+        Returns (prev_fast, prev_slow, current_fast, current_slow) once slow_period + 1
+        bars have been seen, otherwise None.
+        """
+        stream = self._streams.get(symbol)
+        if stream is None:
+            stream = self._streams[symbol] = {
+                'fast_buf': deque(maxlen=self._fast), 'fast_sum': 0.0,
+                'slow_buf': deque(maxlen=self._slow), 'slow_sum': 0.0,
+                'prev': None
+            }
         
-        # Trend filter: check recent price trend
-        recent_prices = df['close'].tail(5)
-        if len(recent_prices) >= 5:
-            price_trend = (recent_prices.iloc[-1] - recent_prices.iloc[0]) / recent_prices.iloc[0]
-            
-            # Boost confidence if trend aligns with signal
-            if abs(price_trend) > 0.02:  # More than 2% trend
-                if (price_trend > 0 and base_confidence > 0):  # Uptrend + BUY
-                    confidence *= 1.1
-                elif (price_trend < 0 and base_confidence > 0):  # Downtrend + SELL
-                    confidence *= 1.1
+        price = float(price)
+        for buf_key, sum_key in (('fast_buf', 'fast_sum'), ('slow_buf', 'slow_sum')):
+            buf = stream[buf_key]
+            if len(buf) == buf.maxlen:
+                stream[sum_key] -= buf[0]
+            buf.append(price)
+            stream[sum_key] += price
         
-        # Volatility filter: reduce confidence for highly volatile stocks
-        if len(df) >= 20:
-            returns = df['close'].pct_change().tail(20)
-            volatility = returns.std()
-            
-            if volatility > 0.05:  # High volatility (>5% daily moves)
-                confidence *= 0.9
+        if len(stream['slow_buf']) < self._slow:
+            return None
         
-        # Cap confidence
-        return min(self.max_confidence, max(0.0, confidence))
+        current = (stream['fast_sum'] / self._fast, stream['slow_sum'] / self._slow)
+        prev, stream['prev'] = stream['prev'], current
+        if prev is None:
+            return None
+        return prev + current
+    
+    def get_moving_averages(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Full fast/slow MA curves for plotting and backtests"""
+        close = df['close'].to_numpy(dtype=np.float64)
+        return pd.DataFrame({
+            'fast_ma': sma(close, self._fast),
+            'slow_ma': sma(close, self._slow)
+        }, index=df.index)
     
     def get_strategy_info(self) -> Dict:
         """Get strategy information for display"""
@@ -222,23 +290,17 @@ async def test_ma_strategy():
     
     # Create sample data
     dates = pd.date_range(start='2024-01-01', periods=100, freq='D')
-    np.random.seed(42)  # For reproducible results
+    rng = np.random.default_rng(42)  # For reproducible results
     
-    # Generate sample price data with trend
-    base_price = 100
-    prices = []
-    for i in range(100):
-        # Add trend and noise
-        trend = i * 0.1  # Slight upward trend
-        noise = np.random.normal(0, 2)  # Random noise
-        price = base_price + trend + noise
-        prices.append(max(50, price))  # Keep prices reasonable
+    # Sample price data: slight upward trend plus noise, kept above 50
+    noise = rng.normal(0, 2, 100)
+    prices = np.maximum(50, 100 + np.arange(100) * 0.1 + noise)
     
     # Create sample DataFrame
     sample_data = pd.DataFrame({
         'date': dates,
         'close': prices,
-        'volume': np.random.randint(50000, 500000, 100)
+        'volume': rng.integers(50000, 500000, 100)
     })
     
     # Create strategy
@@ -268,8 +330,6 @@ async def test_ma_strategy():
         print(f"  {key}: {value}")
 
 if __name__ == "__main__":
-    import asyncio
-    
     # Set up logging
     logging.basicConfig(
         level=logging.INFO,
@@ -4,14 +4,35 @@ RSI Mean Reversion Strategy
 Relative Strength Index strategy for IBKR Strategy Engine
 """
 
+import asyncio
+import os
 import pandas as pd
 import numpy as np
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from numpy.lib.stride_tricks import sliding_window_view
 import logging
 
 # Import base strategy class
-from strategy_engine import BaseStrategy, TradingSignal, SignalType
+from strategy_engine import BaseStrategy, TradingSignal, SignalType, BUY, SELL, HOLD
+from ._rsi_njit import (rsi as _rsi, wilder_rsi as _wilder_rsi, rsi_batch, rsi_seed, rsi_update,
+                        apply_filters as _apply_filters_kernel)
+
+RSI_TAIL = 5  # Latest RSI values kept per symbol; the filters look back 3 bars
+RSI_SLOPE_LAG = 2  # Bars the RSI trend filter compares against
+VOLUME_TAIL = 20  # Bars of volume the filters average over
+
+# RSI category buckets for np.searchsorted(side='left'): bounds 40, 70 and 80 belong
+# to the bucket above them, so those edges sit one ulp below the round number
+_CAT_BOUNDS = np.array([20, 30, np.nextafter(40, 0), 60, np.nextafter(70, 0), np.nextafter(80, 0)])
+_CAT_LABELS = np.array(["Extremely Oversold", "Oversold", "Trending", "Neutral",
+                        "Trending", "Overbought", "Extremely Overbought"], dtype=object)
+
+def _categories_vec(rsi_values: np.ndarray) -> np.ndarray:
+    """RSI category labels for an array of RSI values (same buckets as _get_rsi_category)"""
+    labels = _CAT_LABELS[np.searchsorted(_CAT_BOUNDS, rsi_values)]
+    labels[np.isnan(rsi_values)] = "Trending"
+    return labels
 
 class RSIMeanReversionStrategy(BaseStrategy):
     """
@@ -27,7 +48,7 @@ class RSIMeanReversionStrategy(BaseStrategy):
     
     def __init__(self, rsi_period: int = 14, oversold_threshold: float = 30, 
                  overbought_threshold: float = 70, position_size_pct: float = 0.03,
-                 min_volume: int = 100000):
+                 min_volume: int = 100000, smoothing: str = 'ema'):
         
         # Validate parameters
         if not 2 <= rsi_period <= 50:
@@ -36,16 +57,21 @@ class RSIMeanReversionStrategy(BaseStrategy):
             raise ValueError("Invalid RSI thresholds")
         if not 0.01 <= position_size_pct <= 0.15:
             raise ValueError("Position size must be between 1% and 15%")
+        if smoothing not in ('ema', 'wilder'):
+            raise ValueError("Smoothing must be 'ema' or 'wilder'")
         
         parameters = {
             'rsi_period': rsi_period,
             'oversold_threshold': oversold_threshold,
             'overbought_threshold': overbought_threshold,
             'position_size_pct': position_size_pct,
-            'min_volume': min_volume
+            'min_volume': min_volume,
+            'smoothing': smoothing
         }
         
         name = f"RSI_{rsi_period}_{int(oversold_threshold)}_{int(overbought_threshold)}"
+        if smoothing == 'wilder':
+            name += "_W"
         description = f"RSI Mean Reversion: Buy<{oversold_threshold}, Sell>{overbought_threshold}"
         
         super().__init__(name, description, parameters)
@@ -56,6 +82,17 @@ class RSIMeanReversionStrategy(BaseStrategy):
         self.extreme_oversold = oversold_threshold - 10  # Very oversold
         self.extreme_overbought = overbought_threshold + 10  # Very overbought
         
+        # Parameter-derived constants for the per-symbol hot path
+        self._period = rsi_period
+        self._required = rsi_period + 20  # Extra buffer for RSI calculation
+        self._oversold = oversold_threshold
+        self._overbought = overbought_threshold
+        self._min_volume = min_volume
+        self._wilder = smoothing == 'wilder'
+        
+        # Per-symbol RSI recursion state so new bars only advance the averages
+        self._rsi_state = {}
+        
         self.logger.info(f"Initialized RSI Strategy: {rsi_period} period, "
                         f"oversold<{oversold_threshold}, overbought>{overbought_threshold}")
     
@@ -65,82 +102,226 @@ class RSIMeanReversionStrategy(BaseStrategy):
         
         RSI = 100 - (100 / (1 + RS))
         RS = Average Gain / Average Loss over the period
-        """
         
-        # Calculate price changes
-        delta = prices.diff()
-        
-        # Separate gains and losses
-        gains = delta.where(delta > 0, 0)
-        losses = -delta.where(delta < 0, 0)
-        
-        # Calculate average gains and losses using EMA (smoothing)
-        avg_gains = gains.ewm(span=period, adjust=False).mean()
-        avg_losses = losses.ewm(span=period, adjust=False).mean()
-        
-        # Calculate RSI
-        rs = avg_gains / avg_losses
-        rsi = 100 - (100 / (1 + rs))
+        Averages are EMA(span=period) by default, or Wilder's (TA-Lib) with smoothing='wilder'.
+        """
+        close = prices.to_numpy(dtype=np.float64, copy=False)
+        if self._wilder:
+            values = _wilder_rsi(close, period)
+        else:
+            values = _rsi(close, period)
+        return pd.Series(values, index=prices.index)
+    
+    def _rsi_tail(self, symbol: str, close: np.ndarray, index: pd.Index) -> np.ndarray:
+        """
+        Latest RSI_TAIL RSI values for symbol, advancing cached averages over new bars
         
-        return rsi
+        The cache is reused only when the bars it covered are still the head of the
+        series (same first/last labels and last close); otherwise RSI is rebuilt.
+        """
+        period = self._period
+        wilder = self._wilder
+        if wilder and close.size <= period:
+            return np.full(min(close.size, RSI_TAIL), np.nan)
+        
+        tail = self._cached_rsi_tail(symbol, close, index)
+        if tail is None:
+            start, avg_gain, avg_loss = rsi_seed(close, period, wilder)
+            new, avg_gain, avg_loss = rsi_update(close, start, avg_gain, avg_loss, period, wilder)
+            tail = new[-RSI_TAIL:]
+            self._store_rsi_state(symbol, close, index, avg_gain, avg_loss, tail)
+        return tail
+    
+    def _cached_rsi_tail(self, symbol: str, close: np.ndarray, index: pd.Index) -> Optional[np.ndarray]:
+        """RSI tail from the cached state advanced over any new bars, or None when it must be rebuilt"""
+        n = close.size
+        
+        state = self._rsi_state.get(symbol)
+        if (state is None or n < state['n']
+                or index[0] != state['first'] or index[state['n'] - 1] != state['last']
+                or close[state['n'] - 1] != state['last_close']):
+            return None
+        if n == state['n']:
+            return state['tail']
+        
+        new, avg_gain, avg_loss = rsi_update(close, state['n'], state['avg_gain'], state['avg_loss'],
+                                             self._period, self._wilder)
+        tail = np.concatenate((state['tail'], new))[-RSI_TAIL:]
+        self._store_rsi_state(symbol, close, index, avg_gain, avg_loss, tail)
+        return tail
+    
+    def _store_rsi_state(self, symbol: str, close: np.ndarray, index: pd.Index,
+                         avg_gain: float, avg_loss: float, tail: np.ndarray):
+        """Remember where the RSI recursion for symbol stopped"""
+        self._rsi_state[symbol] = {
+            'n': close.size, 'first': index[0], 'last': index[-1], 'last_close': close[-1],
+            'avg_gain': avg_gain, 'avg_loss': avg_loss, 'tail': tail
+        }
     
-    async def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[TradingSignal]:
+    async def generate_signals(self, market_data: Dict[str, pd.DataFrame],
+                               now: Optional[datetime] = None) -> List[TradingSignal]:
         """Generate RSI mean reversion signals"""
         signals = []
+        required_periods = self._required
+        
+        eligible = [(symbol, df) for symbol, df in market_data.items() if len(df) >= required_periods]
+        if len(eligible) < len(market_data):
+            self.logger.debug(f"Skipped {len(market_data) - len(eligible)} symbols with fewer than "
+                              f"{required_periods} bars")
+        if not eligible:
+            self.logger.info(f"Generated 0 RSI signals from {len(market_data)} symbols")
+            return signals
+        
+        # Only close and volume are read, so copy them once into dense symbol x bar
+        # matrices (right-aligned, one row per symbol) instead of touching each frame
+        lengths = np.array([len(df) for _, df in eligible], dtype=np.int64)
+        days = int(lengths.max())
+        closes = np.full((len(eligible), days), np.nan)
+        volumes = np.zeros((len(eligible), VOLUME_TAIL), dtype=np.float32)  # Only averaged
+        current_volumes = np.zeros(len(eligible))  # Exact, for min_volume and metadata
+        has_volume = np.zeros(len(eligible), dtype=bool)
+        valid = np.ones(len(eligible), dtype=bool)
+        for j, (symbol, df) in enumerate(eligible):
+            try:
+                closes[j, days - lengths[j]:] = df['close'].to_numpy(dtype=np.float64)
+                if 'volume' in df.columns:
+                    volume = df['volume'].to_numpy()
+                    volumes[j] = volume[-VOLUME_TAIL:]
+                    current_volumes[j] = volume[-1]
+                    has_volume[j] = True
+                    
+            except Exception as e:
+                self.logger.error(f"Error analyzing {symbol}: {e}")
+                valid[j] = False
         
-        for symbol, df in market_data.items():
+        # Cached symbols advance incrementally; the rest are rebuilt together below
+        tails = {}
+        rebuild = []
+        for j, (symbol, df) in enumerate(eligible):
+            if not valid[j]:
+                continue
             try:
-                signal = self._analyze_symbol(symbol, df)
-                if signal:
-                    signals.append(signal)
+                tail = self._cached_rsi_tail(symbol, closes[j, days - lengths[j]:], df.index)
+                if tail is None:
+                    rebuild.append(j)
+                else:
+                    tails[j] = tail
                     
             except Exception as e:
                 self.logger.error(f"Error analyzing {symbol}: {e}")
                 continue
         
+        # One parallel kernel call for every symbol without usable state
+        if rebuild:
+            try:
+                rows = rebuild if len(rebuild) < len(eligible) else slice(None)
+                batch_tails, avg_gains, avg_losses = await asyncio.to_thread(
+                    rsi_batch, closes[rows], lengths[rows], self._period,
+                    self._wilder, RSI_TAIL
+                )
+                for k, j in enumerate(rebuild):
+                    symbol, df = eligible[j]
+                    tails[j] = batch_tails[k]
+                    self._store_rsi_state(symbol, closes[j, days - lengths[j]:], df.index,
+                                          avg_gains[k], avg_losses[k], batch_tails[k])
+                    
+            except Exception as e:
+                self.logger.error(f"Error calculating RSI batch: {e}")
+        
+        # Signal direction, base confidence and metadata labels for every symbol in one go
+        current = np.array([tail[-1] for tail in tails.values()])
+        directions, base_confidences = self._determine_signal_vec(current)
+        batch = dict(zip(tails, zip(directions, base_confidences,
+                                    _categories_vec(current), self._strengths_vec(current))))
+        
+        # Signals for symbols outside the neutral zone, built concurrently in worker threads
+        candidates = [j for j in range(len(eligible)) if j in batch and batch[j][0] != 0]
+        semaphore = asyncio.Semaphore(os.cpu_count() or 1)
+        timestamp = now or datetime.now()  # One timestamp for the whole batch
+        
+        async def build(j):
+            direction, base_confidence, category, strength = batch[j]
+            signal_type = BUY if direction > 0 else SELL
+            async with semaphore:
+                return await asyncio.to_thread(
+                    self._build_signal, eligible[j][0], closes[j, days - lengths[j]:],
+                    volumes[j] if has_volume[j] else None, tails[j], (category, strength),
+                    (signal_type, float(base_confidence)),
+                    current_volumes[j] if has_volume[j] else None, timestamp
+                )
+        
+        results = await asyncio.gather(*(build(j) for j in candidates), return_exceptions=True)
+        for j, result in zip(candidates, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error analyzing {eligible[j][0]}: {result}")
+            elif result is not None:
+                signals.append(result)
+        
         self.logger.info(f"Generated {len(signals)} RSI signals from {len(market_data)} symbols")
         return signals
     
-    def _analyze_symbol(self, symbol: str, df: pd.DataFrame) -> Optional[TradingSignal]:
+    def _analyze_symbol(self, symbol: str, df: pd.DataFrame,
+                        timestamp: Optional[datetime] = None) -> Optional[TradingSignal]:
         """Analyze a single symbol for RSI signals"""
         
         # Check if we have enough data
-        required_periods = self.parameters['rsi_period'] + 20  # Extra buffer for RSI calculation
+        required_periods = self._required
         if len(df) < required_periods:
             self.logger.debug(f"Insufficient data for {symbol}: {len(df)} < {required_periods} bars")
             return None
         
-        # Calculate RSI
-        rsi = self.calculate_rsi(df['close'], self.parameters['rsi_period'])
+        close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64) if 'volume' in df.columns else None
+        
+        # Latest RSI values (incremental across calls)
+        rsi = self._rsi_tail(symbol, close, df.index)
+        return self._build_signal(symbol, close, volume, rsi, timestamp=timestamp)
+    
+    def _build_signal(self, symbol: str, close: np.ndarray, volume: Optional[np.ndarray],
+                      rsi: np.ndarray, labels: Optional[Tuple[str, str]] = None,
+                      decision: Optional[Tuple[SignalType, float]] = None,
+                      current_volume: Optional[float] = None,
+                      timestamp: Optional[datetime] = None) -> Optional[TradingSignal]:
+        """
+        Turn a symbol's closes, volumes (None without a volume column) and latest RSI
+        values into a signal
+        
+        labels is the (category, strength) metadata and decision the (signal type,
+        base confidence), when generate_signals has already computed them for the batch;
+        current_volume is the exact last volume when volume is a reduced-precision tail;
+        timestamp is the batch timestamp (now when omitted).
+        """
         
         # Get current values
-        current_rsi = rsi.iloc[-1]
-        current_price = df['close'].iloc[-1]
-        current_volume = df.get('volume', pd.Series([0])).iloc[-1]
+        current_rsi = rsi[-1]
+        current_price = close[-1]
+        if current_volume is None:
+            current_volume = volume[-1] if volume is not None else 0
         
         # Check volume requirement
-        if current_volume < self.parameters['min_volume']:
-            self.logger.debug(f"Volume too low for {symbol}: {current_volume}")
+        if current_volume < self._min_volume:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Volume too low for {symbol}: {current_volume}")
             return None
         
         # Determine signal type and base confidence
-        signal_type, base_confidence = self._determine_signal(current_rsi)
+        if decision is None:
+            decision = self._determine_signal(current_rsi)
+        signal_type, base_confidence = decision
         
-        if signal_type == SignalType.HOLD:
+        if signal_type == HOLD:
             return None
         
         # Apply additional filters to adjust confidence
-        confidence = self._apply_filters(symbol, df, rsi, base_confidence, current_volume)
+        confidence = self._apply_filters(symbol, close, volume, rsi, base_confidence, current_volume)
         
         if confidence < self.min_confidence:
-            self.logger.debug(f"Confidence too low for {symbol}: {confidence:.2%}")
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug(f"Confidence too low for {symbol}: {confidence:.2%}")
             return None
         
         # Calculate position size
-        quantity = self.calculate_position_size(
-            TradingSignal(symbol, signal_type, confidence, current_price, 0, self.name, datetime.now()),
-            100000  # Default portfolio value
-        )
+        quantity = self.calculate_quantity(current_price, 100000)  # Default portfolio value
         
         # Create signal
         signal = TradingSignal(
@@ -150,31 +331,32 @@ class RSIMeanReversionStrategy(BaseStrategy):
             price=current_price,
             quantity=quantity,
             strategy_name=self.name,
-            timestamp=datetime.now(),
+            timestamp=timestamp or datetime.now(),
             metadata={
                 'rsi': round(current_rsi, 2),
-                'rsi_category': self._get_rsi_category(current_rsi),
-                'oversold_threshold': self.parameters['oversold_threshold'],
-                'overbought_threshold': self.parameters['overbought_threshold'],
-                'signal_strength': self._get_signal_strength(current_rsi),
+                'rsi_category': labels[0] if labels else self._get_rsi_category(current_rsi),
+                'oversold_threshold': self._oversold,
+                'overbought_threshold': self._overbought,
+                'signal_strength': labels[1] if labels else self._get_signal_strength(current_rsi),
                 'volume': int(current_volume)
             }
         )
         
-        self.logger.info(f"{signal_type.value} signal for {symbol}: "
-                        f"RSI={current_rsi:.1f}, price=${current_price:.2f}, confidence={confidence:.1%}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(f"{signal_type.value} signal for {symbol}: "
+                            f"RSI={current_rsi:.1f}, price=${current_price:.2f}, confidence={confidence:.1%}")
         
         return signal
     
     def _determine_signal(self, rsi: float) -> tuple:
         """Determine signal type and base confidence from RSI value"""
         
-        oversold = self.parameters['oversold_threshold']
-        overbought = self.parameters['overbought_threshold']
+        oversold = self._oversold
+        overbought = self._overbought
         
         if rsi <= oversold:
             # Oversold → BUY signal (expect price to bounce back up)
-            signal_type = SignalType.BUY
+            signal_type = BUY
             
             # More oversold = higher confidence
             if rsi <= self.extreme_oversold:
@@ -185,7 +367,7 @@ class RSIMeanReversionStrategy(BaseStrategy):
                 
         elif rsi >= overbought:
             # Overbought → SELL signal (expect price to fall back down)
-            signal_type = SignalType.SELL
+            signal_type = SELL
             
             # More overbought = higher confidence
             if rsi >= self.extreme_overbought:
@@ -196,63 +378,51 @@ class RSIMeanReversionStrategy(BaseStrategy):
                 
         else:
             # Neutral zone → No signal
-            return SignalType.HOLD, 0.0
+            return HOLD, 0.0
         
         return signal_type, min(self.max_confidence, confidence)
     
-    def _apply_filters(self, symbol: str, df: pd.DataFrame, rsi: pd.Series,
-                      base_confidence: float, current_volume: float) -> float:
-        """Apply additional filters to adjust confidence"""
-        
-        confidence = base_confidence
+    def _determine_signal_vec(self, rsi_values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Branchless _determine_signal for an array of RSI values
         
-        # Volume filter
-        avg_volume = df.get('volume', pd.Series([1])).tail(20).mean()
+        Returns (direction, confidence): direction is 1 for BUY, -1 for SELL and 0 for HOLD.
+        """
+        oversold = self._oversold
+        overbought = self._overbought
+        
+        buy = rsi_values <= oversold
+        sell = rsi_values >= overbought
+        buy_confidence = np.where(rsi_values <= self.extreme_oversold, 0.8,
+                                  np.maximum(0.3, (oversold - rsi_values) / oversold * 2))
+        sell_confidence = np.where(rsi_values >= self.extreme_overbought, 0.8,
+                                   np.maximum(0.3, (rsi_values - overbought) / (100 - overbought) * 2))
+        
+        confidence = np.select([buy, sell], [buy_confidence, sell_confidence], default=0.0)
+        direction = buy.astype(np.int8) - (sell & ~buy).astype(np.int8)
+        return direction, np.minimum(self.max_confidence, confidence)
+    
+    def _apply_filters(self, symbol: str, close: np.ndarray, volume: Optional[np.ndarray],
+                      rsi: np.ndarray, base_confidence: float, current_volume: float) -> float:
+        """Apply additional filters to adjust confidence (arithmetic in _rsi_njit.apply_filters)"""
+        
+        # Filter inputs from one pass over the last 21 closes / 20 volumes
+        close_tail = close[-21:]
+        returns = close_tail[1:] / close_tail[:-1] - 1.0  # Last 20 daily returns
+        recent_returns = returns[-5:].mean()
+        volatility = returns.std(ddof=1)
+        avg_volume = volume[-VOLUME_TAIL:].mean(dtype=np.float64) if volume is not None else 1.0
         volume_ratio = current_volume / max(avg_volume, 1)
         
-        if volume_ratio > 1.5:
-            confidence *= 1.15  # Boost for high volume
-        elif volume_ratio < 0.7:
-            confidence *= 0.85  # Penalty for low volume
+        # RSI trend over the last RSI_SLOPE_LAG bars
+        has_rsi_trend = len(rsi) >= 5
+        rsi_slope = rsi[-1] - rsi[-1 - RSI_SLOPE_LAG] if has_rsi_trend else 0.0
         
-        # RSI trend filter: check if RSI is moving in favor of mean reversion
-        if len(rsi) >= 5:
-            rsi_recent = rsi.tail(5)
-            current_rsi = rsi.iloc[-1]
-            
-            # For BUY signals (oversold), prefer if RSI is starting to rise
-            if base_confidence > 0 and current_rsi < 35:  # Oversold region
-                if rsi_recent.iloc[-1] > rsi_recent.iloc[-3]:  # RSI rising
-                    confidence *= 1.1
-            
-            # For SELL signals (overbought), prefer if RSI is starting to fall
-            elif base_confidence > 0 and current_rsi > 65:  # Overbought region
-                if rsi_recent.iloc[-1] < rsi_recent.iloc[-3]:  # RSI falling
-                    confidence *= 1.1
-        
-        # Price momentum filter: penalize if price momentum is too strong against us
-        if len(df) >= 10:
-            recent_returns = df['close'].pct_change().tail(5).mean()
-            
-            # If we're buying (oversold) but price is falling fast, reduce confidence
-            if base_confidence > 0 and current_rsi < 35 and recent_returns < -0.02:
-                confidence *= 0.9
-            
-            # If we're selling (overbought) but price is rising fast, reduce confidence  
-            elif base_confidence > 0 and current_rsi > 65 and recent_returns > 0.02:
-                confidence *= 0.9
-        
-        # Volatility filter: RSI works better in normal volatility environments
-        if len(df) >= 20:
-            returns = df['close'].pct_change().tail(20)
-            volatility = returns.std()
-            
-            if volatility > 0.06:  # High volatility
-                confidence *= 0.85
-            elif volatility < 0.02:  # Low volatility  
-                confidence *= 1.05
-        
-        return min(self.max_confidence, max(0.0, confidence))
+        return _apply_filters_kernel(
+            float(base_confidence), float(volume_ratio), float(rsi[-1]), float(rsi_slope),
+            has_rsi_trend, float(recent_returns), float(volatility), close.size,
+            float(self.max_confidence)
+        )
     
     def _get_rsi_category(self, rsi: float) -> str:
         """Get human-readable RSI category"""
@@ -271,8 +441,8 @@ class RSIMeanReversionStrategy(BaseStrategy):
     
     def _get_signal_strength(self, rsi: float) -> str:
         """Get signal strength description"""
-        oversold = self.parameters['oversold_threshold']
-        overbought = self.parameters['overbought_threshold']
+        oversold = self._oversold
+        overbought = self._overbought
         
         if rsi <= oversold - 10 or rsi >= overbought + 10:
             return "Very Strong"
@@ -281,6 +451,25 @@ class RSIMeanReversionStrategy(BaseStrategy):
         else:
             return "Weak"
     
+    def _strengths_vec(self, rsi_values: np.ndarray) -> np.ndarray:
+        """Signal strength labels for an array of RSI values (same rules as _get_signal_strength)"""
+        oversold = self._oversold
+        overbought = self._overbought
+        return np.select(
+            [(rsi_values <= oversold - 10) | (rsi_values >= overbought + 10),
+             (rsi_values <= oversold) | (rsi_values >= overbought)],
+            ["Very Strong", "Strong"], default="Weak"
+        ).astype(object)
+    
+    def get_rsi_slopes(self, df: pd.DataFrame) -> pd.Series:
+        """Full RSI slope curve (change over RSI_SLOPE_LAG bars) for plotting and backtests"""
+        rsi = self.calculate_rsi(df['close'], self._period).to_numpy()
+        slopes = np.full(rsi.size, np.nan)
+        if rsi.size > RSI_SLOPE_LAG:
+            windows = sliding_window_view(rsi, RSI_SLOPE_LAG + 1)  # Strided view, no copy
+            slopes[RSI_SLOPE_LAG:] = windows[:, -1] - windows[:, 0]
+        return pd.Series(slopes, index=df.index, name='rsi_slope')
+    
     def get_strategy_info(self) -> Dict:
         """Get strategy information for display"""
         return {
@@ -393,8 +582,6 @@ async def test_rsi_strategy():
                   f"confidence: {signal.confidence:.1%})")
 
 if __name__ == "__main__":
-    import asyncio
-    
     # Set up logging
     logging.basicConfig(
         level=logging.INFO,
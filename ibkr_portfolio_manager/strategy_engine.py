@@ -5,16 +5,83 @@ Clean, simple implementation with essential features
 """
 
 import asyncio
+import itertools
+import operator
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+from collections import OrderedDict, deque
 import logging
 
 # Strategy Engine Imports
 from ib_insync import *
+from jit import njit, NUMBA_AVAILABLE
+
+# Historical data requests in flight at once, kept low for IBKR's pacing limits
+HISTORICAL_CONCURRENCY = 8
+BAR_CACHE_TTL = 300  # Seconds fetched bars are reused (today's bar is still forming)
+BAR_CACHE_SIZE = 512  # (symbol, timeframe, duration) entries kept
+SIGNALS_HISTORY_SIZE = 1000  # Most recent signals kept in signals_history
+BAR_FLOAT_FIELDS = ('open', 'high', 'low', 'close', 'volume', 'average')
+
+def _bars_frame(bars) -> pd.DataFrame:
+    """Historical bars as a DataFrame with lower-case columns, same as util.df(bars) renamed"""
+    n = len(bars)
+    columns = {'date': [bar.date for bar in bars]}
+    for name in BAR_FLOAT_FIELDS:
+        columns[name] = np.fromiter((getattr(bar, name) for bar in bars), dtype=np.float64, count=n)
+    columns['barcount'] = np.fromiter((bar.barCount for bar in bars), dtype=np.int64, count=n)
+    return pd.DataFrame(columns)
+
+@njit(cache=True, nogil=True, error_model='numpy')  # x/0 gives inf, not an exception
+def _ma_crossover(closes: np.ndarray, fast: int, slow: int):
+    """
+    Crossover code and confidence for each row of the last slow+1 closes
+    
+    Returns (codes, confidence, current_fast, current_slow); codes are 1 for a golden
+    cross, -1 for a death cross and 0 otherwise (confidence 0).
+    """
+    m, width = closes.shape
+    codes = np.zeros(m, dtype=np.int8)
+    confidence = np.zeros(m)
+    current_fast = np.empty(m)
+    current_slow = np.empty(m)
+    
+    for i in range(m):
+        fast_sum = 0.0
+        prev_fast_sum = 0.0
+        for k in range(width - fast, width):
+            fast_sum += closes[i, k]
+            prev_fast_sum += closes[i, k - 1]
+        slow_sum = 0.0
+        prev_slow_sum = 0.0
+        for k in range(width - slow, width):
+            slow_sum += closes[i, k]
+            prev_slow_sum += closes[i, k - 1]
+        
+        cf = fast_sum / fast
+        cs = slow_sum / slow
+        pf = prev_fast_sum / fast
+        ps = prev_slow_sum / slow
+        current_fast[i] = cf
+        current_slow[i] = cs
+        
+        # Branchless: crossover flags as 0/1 and the divisor picked by select
+        bull = (pf <= ps) & (cf > cs)
+        bear = (pf >= ps) & (cf < cs)
+        codes[i] = np.int8(bull) - np.int8(bear)
+        crossed = bull | bear
+        denominator = cs if bull else cf
+        confidence[i] = crossed * min(0.8, abs(cf - cs) / denominator)
+    
+    return codes, confidence, current_fast, current_slow
+
+if NUMBA_AVAILABLE:
+    _ma_crossover(np.ones((1, 21)), 10, 20)
 
 # Enums for signal types
 class SignalType(Enum):
@@ -22,6 +89,9 @@ class SignalType(Enum):
     SELL = "SELL" 
     HOLD = "HOLD"
 
+# Members as plain module names for the per-signal paths (skips the Enum class lookup)
+BUY, SELL, HOLD = SignalType.BUY, SignalType.SELL, SignalType.HOLD
+
 class OrderStatus(Enum):
     PENDING = "PENDING"
     FILLED = "FILLED"
@@ -29,7 +99,7 @@ class OrderStatus(Enum):
     REJECTED = "REJECTED"
 
 # Data structures for signals and trades
-@dataclass
+@dataclass(slots=True, frozen=True)
 class TradingSignal:
     symbol: str
     signal: SignalType
@@ -38,13 +108,9 @@ class TradingSignal:
     quantity: int
     strategy_name: str
     timestamp: datetime
-    metadata: Dict[str, Any] = None
-    
-    def __post_init__(self):
-        if self.metadata is None:
-            self.metadata = {}
+    metadata: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass 
+@dataclass(slots=True, frozen=True)
 class Trade:
     trade_id: str
     symbol: str
@@ -64,23 +130,32 @@ class BaseStrategy:
         self.name = name
         self.description = description
         self.parameters = parameters
+        self._position_size_pct = parameters.get('position_size_pct', 0.05)  # Read on every sizing
         self.enabled = True
         self.signals_generated = 0
         self.trades_made = 0
         self.total_pnl = 0.0
         self.logger = logging.getLogger(f"Strategy.{name}")
     
-    async def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[TradingSignal]:
-        """Generate trading signals - to be implemented by each strategy"""
+    async def generate_signals(self, market_data: Dict[str, pd.DataFrame],
+                               now: Optional[datetime] = None) -> List[TradingSignal]:
+        """
+        Generate trading signals - to be implemented by each strategy
+        
+        now is the timestamp for the batch's signals (datetime.now() when omitted).
+        """
         raise NotImplementedError("Each strategy must implement generate_signals")
     
     def calculate_position_size(self, signal: TradingSignal, portfolio_value: float) -> int:
         """Calculate position size for a trade"""
-        position_size_pct = self.parameters.get('position_size_pct', 0.05)
-        position_value = portfolio_value * position_size_pct
+        return self.calculate_quantity(signal.price, portfolio_value)
+    
+    def calculate_quantity(self, price: float, portfolio_value: float) -> int:
+        """Calculate position size from a bare price, without building a signal"""
+        position_value = portfolio_value * self._position_size_pct
         
-        if signal.price > 0:
-            return max(1, int(position_value / signal.price))
+        if price > 0:
+            return max(1, int(position_value / price))
         return 100  # Default fallback
 
 # Simple Moving Average Strategy Implementation  
@@ -96,75 +171,116 @@ class MovingAverageStrategy(BaseStrategy):
         
         description = f"Buy when {fast_period}-day MA crosses above {slow_period}-day MA"
         super().__init__("MovingAverage", description, parameters)
+        self._fast = fast_period
+        self._slow = slow_period
+        
+        # Per-symbol running sums for streaming bars (see update / warm_up)
+        self._streams = {}
     
-    async def generate_signals(self, market_data: Dict[str, pd.DataFrame]) -> List[TradingSignal]:
+    async def generate_signals(self, market_data: Dict[str, pd.DataFrame],
+                               now: Optional[datetime] = None) -> List[TradingSignal]:
         signals = []
+        now = now or datetime.now()  # One timestamp for the whole batch
+        fast = self._fast
+        slow = self._slow
         
+        # Last slow+1 closes of every symbol with enough history, one row per symbol
+        closes = np.empty((len(market_data), slow + 1))
+        symbols = []
         for symbol, df in market_data.items():
             try:
-                if len(df) < self.parameters['slow_period'] + 2:
+                if len(df) < slow + 2:
                     continue
+                closes[len(symbols)] = df['close'].to_numpy(dtype=np.float64)[-slow - 1:]
+                symbols.append(symbol)
                 
-                # Calculate moving averages
-                fast_ma = df['close'].rolling(window=self.parameters['fast_period']).mean()
-                slow_ma = df['close'].rolling(window=self.parameters['slow_period']).mean()
-                
-                # Get last two values to detect crossover
-                current_fast = fast_ma.iloc[-1]
-                current_slow = slow_ma.iloc[-1]
-                prev_fast = fast_ma.iloc[-2]
-                prev_slow = slow_ma.iloc[-2]
-                
-                current_price = df['close'].iloc[-1]
+            except Exception as e:
+                self.logger.error(f"Error generating signal for {symbol}: {e}")
+                continue
+        
+        # Golden Cross (bullish) / Death Cross (bearish) and its strength for every
+        # symbol in one compiled pass
+        closes = closes[:len(symbols)]
+        codes, confidence, current_fast, current_slow = _ma_crossover(closes, fast, slow)
+        spread = np.abs(current_fast - current_slow)
+        
+        # Only generate signals where confidence is reasonable
+        for i in np.flatnonzero((codes != 0) & (confidence > 0.1)):
+            symbol = symbols[i]
+            signal_type = BUY if codes[i] > 0 else SELL
+            current_price = closes[i, -1]
+            try:
+                quantity = self.calculate_quantity(current_price, 100000)  # Assume $100k portfolio for now
                 
-                # Check for crossovers
-                signal_type = SignalType.HOLD
-                confidence = 0.0
+                signal = TradingSignal(
+                    symbol=symbol,
+                    signal=signal_type,
+                    confidence=confidence[i],
+                    price=current_price,
+                    quantity=quantity,
+                    strategy_name=self.name,
+                    timestamp=now,
+                    metadata={
+                        'fast_ma': current_fast[i],
+                        'slow_ma': current_slow[i],
+                        'crossover_strength': spread[i]
+                    }
+                )
                 
-                # Golden Cross: fast MA crosses above slow MA (bullish)
-                if prev_fast <= prev_slow and current_fast > current_slow:
-                    signal_type = SignalType.BUY
-                    # Confidence based on crossover strength
-                    confidence = min(0.8, abs(current_fast - current_slow) / current_slow)
-                    
-                # Death Cross: fast MA crosses below slow MA (bearish)  
-                elif prev_fast >= prev_slow and current_fast < current_slow:
-                    signal_type = SignalType.SELL
-                    confidence = min(0.8, abs(current_fast - current_slow) / current_fast)
+                signals.append(signal)
+                self.signals_generated += 1
                 
-                # Only generate signal if confidence is reasonable
-                if signal_type != SignalType.HOLD and confidence > 0.1:
-                    quantity = self.calculate_position_size(
-                        TradingSignal(symbol, signal_type, confidence, current_price, 0, self.name, datetime.now()),
-                        100000  # Assume $100k portfolio for now
-                    )
-                    
-                    signal = TradingSignal(
-                        symbol=symbol,
-                        signal=signal_type,
-                        confidence=confidence,
-                        price=current_price,
-                        quantity=quantity,
-                        strategy_name=self.name,
-                        timestamp=datetime.now(),
-                        metadata={
-                            'fast_ma': current_fast,
-                            'slow_ma': current_slow,
-                            'crossover_strength': abs(current_fast - current_slow)
-                        }
-                    )
-                    
-                    signals.append(signal)
-                    self.signals_generated += 1
-                    
+                if self.logger.isEnabledFor(logging.INFO):
                     self.logger.info(f"Generated {signal_type.value} signal for {symbol}: "
-                                   f"confidence={confidence:.2%}, price=${current_price:.2f}")
+                                   f"confidence={confidence[i]:.2%}, price=${current_price:.2f}")
                 
             except Exception as e:
                 self.logger.error(f"Error generating signal for {symbol}: {e}")
                 continue
         
         return signals
+    
+    def warm_up(self, symbol: str, prices) -> Optional[Tuple[float, float, float, float]]:
+        """Seed the streaming MA state for a symbol from its price history"""
+        self._streams.pop(symbol, None)
+        result = None
+        for price in prices[-(self._slow + 1):]:
+            result = self.update(symbol, price)
+        return result
+    
+    def update(self, symbol: str, price: float) -> Optional[Tuple[float, float, float, float]]:
+        """
+        Push one new bar in O(1) using running sums
+        
+        Returns (prev_fast, prev_slow, current_fast, current_slow) once slow_period + 1
+        bars have been seen, otherwise None.
+        """
+        fast = self._fast
+        slow = self._slow
+        stream = self._streams.get(symbol)
+        if stream is None:
+            stream = self._streams[symbol] = {
+                'fast_buf': deque(maxlen=fast), 'fast_sum': 0.0,
+                'slow_buf': deque(maxlen=slow), 'slow_sum': 0.0,
+                'prev': None
+            }
+        
+        price = float(price)
+        for buf_key, sum_key in (('fast_buf', 'fast_sum'), ('slow_buf', 'slow_sum')):
+            buf = stream[buf_key]
+            if len(buf) == buf.maxlen:
+                stream[sum_key] -= buf[0]
+            buf.append(price)
+            stream[sum_key] += price
+        
+        if len(stream['slow_buf']) < slow:
+            return None
+        
+        current = (stream['fast_sum'] / fast, stream['slow_sum'] / slow)
+        prev, stream['prev'] = stream['prev'], current
+        if prev is None:
+            return None
+        return prev + current
 
 # Main Strategy Engine Class
 class StrategyEngine:
@@ -174,9 +290,17 @@ class StrategyEngine:
         self.pm = portfolio_manager
         self.strategies: List[BaseStrategy] = []
         self.trades: List[Trade] = []
-        self.signals_history: List[TradingSignal] = []
+        self.signals_history = deque(maxlen=SIGNALS_HISTORY_SIZE)  # Oldest signals drop off
+        # When each signal in signals_history was added (never decreasing, evicted in lockstep)
+        self._signal_times = deque(maxlen=SIGNALS_HISTORY_SIZE)
         self.logger = logging.getLogger("StrategyEngine")
         
+        # Recently fetched bars: (symbol, timeframe, duration) -> (fetch time, DataFrame)
+        self._bar_cache = OrderedDict()
+        
+        # One Stock contract per symbol, qualified once and reused for every request
+        self._contract_cache: Dict[str, Stock] = {}
+        
         # Safety settings
         self.paper_trading_mode = True  # ALWAYS start in paper mode!
         self.max_trades_per_day = 10
@@ -207,41 +331,75 @@ class StrategyEngine:
     
     async def get_market_data(self, symbols: List[str], timeframe: str = '1 day', duration: str = '60 D') -> Dict[str, pd.DataFrame]:
         """Get historical market data for analysis"""
-        market_data = {}
-        
+        # Only symbols never seen before need a qualification round-trip
+        unqualified = []
         for symbol in symbols:
+            contract = self._contract_cache.get(symbol)
+            if contract is None:
+                contract = self._contract_cache[symbol] = Stock(symbol, 'SMART', 'USD')
+            if not contract.conId:
+                unqualified.append(contract)
+        if unqualified:
             try:
-                self.logger.debug(f"Fetching market data for {symbol}")
-                
-                # Create stock contract
-                contract = Stock(symbol, 'SMART', 'USD')
-                
-                # Get historical bars
-                bars = self.pm.ib.reqHistoricalData(
-                    contract,
-                    endDateTime='',
-                    durationStr=duration,
-                    barSizeSetting=timeframe,
-                    whatToShow='TRADES',
-                    useRTH=True,
-                    formatDate=1
-                )
-                
-                if bars:
-                    df = util.df(bars)
-                    # Ensure we have the right column names
-                    df.columns = [col.lower() for col in df.columns]
-                    market_data[symbol] = df
-                    self.logger.debug(f"Got {len(df)} bars for {symbol}")
-                else:
-                    self.logger.warning(f"No historical data received for {symbol}")
-                    
+                await self.pm.ib.qualifyContractsAsync(*unqualified)
             except Exception as e:
-                self.logger.error(f"Failed to get market data for {symbol}: {e}")
-                continue
+                self.logger.warning(f"Could not qualify contracts: {e}")
+        
+        # Requests overlap instead of waiting one round-trip per symbol
+        sem = asyncio.Semaphore(HISTORICAL_CONCURRENCY)
+        results = await asyncio.gather(
+            *(self._fetch_one(sem, symbol, timeframe, duration) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        market_data = {}
+        for symbol, df in zip(symbols, results):
+            if isinstance(df, Exception):
+                self.logger.error(f"Failed to get market data for {symbol}: {df}")
+            elif df is not None:
+                market_data[symbol] = df
         
         return market_data
     
+    async def _fetch_one(self, sem: asyncio.Semaphore, symbol: str, timeframe: str,
+                         duration: str) -> Optional[pd.DataFrame]:
+        """Historical bars for one symbol, or None when IBKR returns nothing"""
+        key = (symbol, timeframe, duration)
+        hit = self._bar_cache.get(key)
+        if hit is not None and time.monotonic() - hit[0] < BAR_CACHE_TTL:
+            self._bar_cache.move_to_end(key)
+            return hit[1]
+        
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Fetching market data for {symbol}")
+        
+        # Get historical bars
+        async with sem:
+            bars = await self.pm.ib.reqHistoricalDataAsync(
+                self._contract_cache[symbol],
+                endDateTime='',
+                durationStr=duration,
+                barSizeSetting=timeframe,
+                whatToShow='TRADES',
+                useRTH=True,
+                formatDate=1
+            )
+        
+        if not bars:
+            self.logger.warning(f"No historical data received for {symbol}")
+            return None
+        
+        # Typed columns built straight from the bars, already lower-case
+        df = _bars_frame(bars)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(f"Got {len(df)} bars for {symbol}")
+        
+        self._bar_cache[key] = (time.monotonic(), df)
+        self._bar_cache.move_to_end(key)
+        if len(self._bar_cache) > BAR_CACHE_SIZE:
+            self._bar_cache.popitem(last=False)
+        return df
+    
     async def generate_all_signals(self, symbols: List[str]) -> List[TradingSignal]:
         """Generate signals from all enabled strategies"""
         all_signals = []
@@ -256,48 +414,49 @@ class StrategyEngine:
         
         self.logger.info(f"Retrieved market data for {len(market_data)} symbols")
         
-        # Run each enabled strategy
-        for strategy in self.strategies:
-            if not strategy.enabled:
+        # Run the enabled strategies concurrently; their numeric work is already
+        # spread over worker threads, so one strategy's awaits don't hold up the rest
+        enabled = [strategy for strategy in self.strategies if strategy.enabled]
+        now = datetime.now()  # Shared timestamp for every strategy's signals
+        self.logger.info(f"Running strategies: {', '.join(strategy.name for strategy in enabled)}")
+        results = await asyncio.gather(
+            *(strategy.generate_signals(market_data, now) for strategy in enabled),
+            return_exceptions=True
+        )
+        
+        for strategy, signals in zip(enabled, results):
+            if isinstance(signals, Exception):
+                self.logger.error(f"Error in strategy {strategy.name}: {signals}")
                 continue
             
-            try:
-                self.logger.info(f"Running strategy: {strategy.name}")
-                signals = await strategy.generate_signals(market_data)
-                
-                # Filter by minimum confidence
-                filtered_signals = [
-                    s for s in signals 
-                    if s.confidence >= self.min_signal_confidence
-                ]
-                
-                all_signals.extend(filtered_signals)
-                
-                self.logger.info(f"Strategy {strategy.name} generated {len(filtered_signals)} signals "
-                               f"(filtered from {len(signals)} total)")
-                
-            except Exception as e:
-                self.logger.error(f"Error in strategy {strategy.name}: {e}")
-                continue
+            # Filter by minimum confidence
+            filtered_signals = [
+                s for s in signals 
+                if s.confidence >= self.min_signal_confidence
+            ]
+            
+            all_signals.extend(filtered_signals)
+            
+            self.logger.info(f"Strategy {strategy.name} generated {len(filtered_signals)} signals "
+                           f"(filtered from {len(signals)} total)")
         
         # Remove duplicate signals for same symbol (keep highest confidence)
         unique_signals = {}
         for signal in all_signals:
-            key = f"{signal.symbol}_{signal.signal.value}"
-            if key not in unique_signals or signal.confidence > unique_signals[key].confidence:
+            key = (signal.symbol, signal.signal)
+            best = unique_signals.get(key)
+            if best is None or signal.confidence > best.confidence:
                 unique_signals[key] = signal
         
-        final_signals = list(unique_signals.values())
-        
         # Sort by confidence (highest first)
-        final_signals.sort(key=lambda x: x.confidence, reverse=True)
+        final_signals = sorted(unique_signals.values(), key=operator.attrgetter('confidence'), reverse=True)
         
-        # Add to history
+        # Add to history (bounded, so no trimming needed)
         self.signals_history.extend(final_signals)
-        
-        # Keep only last 1000 signals in history
-        if len(self.signals_history) > 1000:
-            self.signals_history = self.signals_history[-1000:]
+        added = datetime.now()
+        if self._signal_times and added < self._signal_times[-1]:
+            added = self._signal_times[-1]  # Clock stepped back: keep the times sorted
+        self._signal_times.extend([added] * len(final_signals))
         
         self.logger.info(f"Generated {len(final_signals)} unique signals")
         return final_signals
@@ -306,7 +465,8 @@ class StrategyEngine:
         """Execute a trading signal"""
         
         if self.paper_trading_mode:
-            self.logger.info(f"PAPER TRADE: {signal.signal.value} {signal.quantity} {signal.symbol} @ ${signal.price:.2f}")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(f"PAPER TRADE: {signal.signal.value} {signal.quantity} {signal.symbol} @ ${signal.price:.2f}")
             
             # Create mock trade for paper trading
             trade = Trade(
@@ -333,9 +493,10 @@ class StrategyEngine:
             contract = Stock(signal.symbol, 'SMART', 'USD')
             
             # Create order
-            action = 'BUY' if signal.signal == SignalType.BUY else 'SELL'
+            action = 'BUY' if signal.signal == BUY else 'SELL'
             order = MarketOrder(action, signal.quantity)
-            order.orderRef = f"{signal.strategy_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+            now = datetime.now()
+            order.orderRef = f"{signal.strategy_name}_{now.strftime('%Y%m%d_%H%M%S')}"
             
             # Place order
             ib_trade = self.pm.ib.placeOrder(contract, order)
@@ -347,7 +508,7 @@ class StrategyEngine:
                 action=action,
                 quantity=signal.quantity,
                 price=signal.price,
-                timestamp=datetime.now(),
+                timestamp=now,
                 strategy=signal.strategy_name,
                 status=OrderStatus.PENDING
             )
@@ -387,7 +548,20 @@ class StrategyEngine:
     
     def get_recent_signals(self, count: int = 10) -> List[TradingSignal]:
         """Get most recent signals"""
-        return self.signals_history[-count:] if self.signals_history else []
+        start = max(0, len(self.signals_history) - count)
+        return list(itertools.islice(self.signals_history, start, None))
+    
+    def get_signals_since(self, since: datetime) -> List[TradingSignal]:
+        """Signals added to the history at or after since, oldest first"""
+        # Insertion times are sorted; walk back from the newest (deque indexing is linear)
+        count = 0
+        for added in reversed(self._signal_times):
+            if added < since:
+                break
+            count += 1
+        recent = list(itertools.islice(reversed(self.signals_history), count))
+        recent.reverse()
+        return recent
     
     def get_recent_trades(self, count: int = 10) -> List[Trade]:
         """Get most recent trades"""
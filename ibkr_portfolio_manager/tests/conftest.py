@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modules import each other as top-level modules (from jit import njit)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,39 @@
+"""Parity of the lexicon sentiment scorer with TextBlob"""
+
+import numpy as np
+import pytest
+
+TextBlob = pytest.importorskip('textblob').TextBlob
+
+from sentiment_lexicon import lexicon_polarities, lexicon_polarity
+
+HEADLINES = [
+    "Shares of AMD fell sharply after weak guidance",
+    "Great earnings! Shares surge.",
+    "Apple reports record quarterly revenue, beating expectations",
+    "Tesla stock is not doing well after the recall",
+    "Investors are really not happy with the merger terms",
+    "Microsoft's cloud growth remains very strong :)",
+    "Analysts don't expect a rebound this year",
+    "Nvidia hits an all-time high!!! Amazing run",
+    "The outlook is extremely bleak for U.S. retailers...",
+    "Oil prices never looked so good (!)",
+    "Fed holds rates steady; markets are mixed",
+    "Bank shares tumble as bad loans pile up :(",
+    "Strong buy: upgrade on surprisingly good margins",
+    "Q3 revenue of $4.5B was in line with estimates (up 8%)",
+    "A terribly disappointing quarter, but guidance is hopeful",
+    "\"Best year ever,\" CEO says - shares rise 5.2%",
+    "It's not a bad deal, honestly",
+    "Sales were horribly weak in Europe; Asia was fine",
+    "",
+]
+
+@pytest.mark.parametrize('text', HEADLINES)
+def test_polarity_matches_textblob(text):
+    assert lexicon_polarity(text) == pytest.approx(TextBlob(text.lower()).sentiment.polarity, abs=1e-12)
+
+def test_batch_matches_single_texts():
+    expected = [lexicon_polarity(text) for text in HEADLINES]
+    np.testing.assert_array_equal(lexicon_polarities(HEADLINES), expected)
+    assert lexicon_polarities([]).shape == (0,)
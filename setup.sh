@@ -212,6 +212,10 @@ else
     exit 1
 fi
 
+# Compile the numeric kernels once so later starts load them from __pycache__
+echo "⚙️ Precompiling numeric kernels..."
+$PYTHON_CMD -c "import strategies, risk_manager" || echo "⚠️ Kernel precompile skipped; kernels will compile on first run"
+
 # Create startup instructions
 echo ""
 echo "🎉 Setup complete!"